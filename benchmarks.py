@@ -0,0 +1,375 @@
+"""Seeded benchmark suite for schedule generation, serialization and ingestion.
+
+Every case uses fixed seeds and synthetic inputs, so runs are comparable
+across changes. Each case reports its best time over several runs, items
+per second where that makes sense, and peak memory from a separate traced
+run.
+
+  python benchmarks.py                   run everything and compare with the baseline
+  python benchmarks.py --save-baseline   store the results as the new baseline
+  python benchmarks.py --filter year     only run cases whose name contains 'year'
+  python benchmarks.py --quick           skip the slowest cases (1M-row CSV)
+
+A case is flagged as a regression when its time or peak memory exceeds the
+baseline by more than the tolerance (default 20%), or its time exceeds the
+case's fixed target, and the exit status is then 1. The startup cases have
+targets: they time a fresh interpreter running the PDF-only path (import
+generate-csv.py and read the prompt excerpt) and the CSV-only path (one
+day from a titles CSV with main.py). Baselines are machine-specific, so
+save one on the machine you compare on. For the generation cases, items
+are days.
+"""
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import datetime
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+
+import main as schedule
+import ics_writer
+import ics_import
+import ics_analytics
+import day_templates
+import llm_tasks
+import pdf_text
+from title_pool import TitlePool
+from stub_model import StubModel
+from task_cleaning import clean_tasks
+
+SEED = 42
+START_DATE = datetime.date(2024, 1, 1)
+DEFAULT_BASELINE = "benchmark-baseline.json"
+DEFAULT_TOLERANCE = 0.2
+# Differences below these are timer and allocator noise, never regressions
+MIN_DELTA = {'seconds': 0.001, 'peak_kb': 64}
+
+BENCHMARKS = []
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+# Startup budgets for a fresh interpreter, including its own ~25 ms
+PDF_PATH_STARTUP_TARGET = 0.25
+CSV_PATH_STARTUP_TARGET = 0.25
+
+def benchmark(name, slow=False, target_seconds=None):
+    """Register a case. The decorated function gets a scratch directory and
+    returns (run, items): a zero-argument callable to time and the number
+    of items it processes (or None)."""
+    def register(setup):
+        BENCHMARKS.append((name, setup, slow, target_seconds))
+        return setup
+    return register
+
+def synthetic_titles(count, seed=SEED):
+    """Return count reproducible task titles."""
+    text = StubModel(seed=seed).generate_content(f"Generate {count} tasks").text
+    return llm_tasks.parse_tasks(text)
+
+def write_titles_csv(path, rows, seed=SEED):
+    rng = random.Random(seed)
+    base = synthetic_titles(1000, seed)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for i in range(rows):
+            f.write(f"{base[i % len(base)]} #{i},{rng.randint(1, 5)}\n")
+
+def write_synthetic_pdf(path, pages, lines_per_page=40, seed=SEED):
+    """Write a plain-text PDF with one task per line, readable by PyPDF2."""
+    titles = synthetic_titles(pages * lines_per_page, seed)
+    page_ids = [4 + 2 * page for page in range(pages)]
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        2: f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {pages} >>".encode(),
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    for page, page_id in enumerate(page_ids):
+        lines = titles[page * lines_per_page:(page + 1) * lines_per_page]
+        text = " T* ".join(f"(- {line})Tj" for line in lines)
+        stream = f"BT /F1 11 Tf 14 TL 50 800 Td {text} ET".encode("latin-1", "replace")
+        objects[page_id] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {page_id + 1} 0 R >>").encode()
+        objects[page_id + 1] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number in range(1, len(objects) + 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, objects[number])
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+def _count_events(days):
+    return sum(len(events) for _, events, _ in days)
+
+@benchmark("generate_day")
+def bench_generate_day(workdir):
+    titles = synthetic_titles(500)
+    return lambda: schedule.generate_day(START_DATE, titles, SEED), None
+
+def _year_case(pattern):
+    def setup(workdir):
+        titles = synthetic_titles(500)
+        return lambda: _count_events(schedule.iter_schedule_days(START_DATE, 365, pattern, titles, SEED)), 365
+    return setup
+
+for _pattern in schedule.PATTERNS:
+    benchmark(f"generate_year_{_pattern}")(_year_case(_pattern))
+
+@benchmark("generate_year_templates")
+def bench_generate_year_templates(workdir):
+    titles = synthetic_titles(500)
+    library = day_templates.load_library(os.path.join(workdir, "day-templates"))
+    return lambda: _count_events(schedule.iter_schedule_days(START_DATE, 365, "workweek", titles, SEED,
+                                                             engine="templates", templates=library)), 365
+
+@benchmark("generate_ics_event_10k")
+def bench_generate_ics_event(workdir):
+    titles = synthetic_titles(500)
+    rng = random.Random(SEED)
+    events = []
+    for _ in range(10_000):
+        start = datetime.datetime.combine(START_DATE, datetime.time(rng.randrange(8, 18), rng.randrange(60)))
+        events.append((start, start + datetime.timedelta(minutes=30), rng.choice(titles)))
+    return lambda: [schedule.generate_ics_event(start, end, title) for start, end, title in events], len(events)
+
+@benchmark("ics_writer_year")
+def bench_ics_writer(workdir):
+    titles = synthetic_titles(500)
+    days = list(schedule.iter_schedule_days(START_DATE, 365, "even", titles, SEED))
+
+    def run():
+        writer = ics_writer.IcsWriter(io.BytesIO(), dtstamp="20240101T000000Z")
+        for current_date, events, _ in days:
+            writer.write_day(current_date, events, titles)
+    return run, _count_events(days)
+
+@benchmark("busy_import_50k_events")
+def bench_busy_import(workdir):
+    titles = synthetic_titles(500)
+    path = os.path.join(workdir, "busy.ics")
+    with open(path, "wb") as f:
+        writer = ics_writer.IcsWriter(f, dtstamp="20240101T000000Z")
+        writer.begin()
+        for current_date, events, _ in schedule.iter_schedule_days(START_DATE, 3000, "even", titles, SEED):
+            writer.write_day(current_date, events, titles)
+        writer.end()
+    return lambda: ics_import.build_busy_index([path]), writer.event_count
+
+@benchmark("ics_analytics_1000_days")
+def bench_ics_analytics(workdir):
+    titles = synthetic_titles(500)
+    path = os.path.join(workdir, "analytics.ics")
+    with open(path, "wb") as f:
+        writer = ics_writer.IcsWriter(f, dtstamp="20240101T000000Z")
+        writer.begin()
+        for current_date, events, _ in schedule.iter_schedule_days(START_DATE, 1000, "workweek", titles, SEED):
+            writer.write_day(current_date, events, titles)
+        writer.end()
+    return lambda: ics_analytics.analyze([path]), 1000
+
+def _titles_csv_case(rows):
+    def setup(workdir):
+        path = os.path.join(workdir, f"titles_{rows}.csv")
+        write_titles_csv(path, rows)
+        rng = random.Random(SEED)
+
+        def run():
+            pool = TitlePool.from_csv(path)
+            for _ in range(1000):
+                pool[pool.sample(rng)]
+            pool.close()
+        return run, rows
+    return setup
+
+benchmark("titles_csv_1k")(_titles_csv_case(1_000))
+benchmark("titles_csv_1m", slow=True)(_titles_csv_case(1_000_000))
+
+@benchmark("pdf_extract_100_pages")
+def bench_pdf_extract(workdir):
+    path = os.path.join(workdir, "synthetic.pdf")
+    write_synthetic_pdf(path, 100)
+
+    def run():
+        pdf_text._cached_reader.cache_clear()
+        return pdf_text.extract_text(path, cache_dir=None)
+    return run, 100
+
+@benchmark("pdf_extract_prompt_excerpt")
+def bench_pdf_excerpt(workdir):
+    path = os.path.join(workdir, "synthetic.pdf")
+    write_synthetic_pdf(path, 100)
+
+    def run():
+        pdf_text._cached_reader.cache_clear()
+        return pdf_text.extract_text(path, max_chars=3000, cache_dir=None)
+    return run, None
+
+@benchmark("llm_stub_1000_tasks")
+def bench_llm_stub(workdir):
+    def run():
+        model = StubModel(seed=SEED)
+        return llm_tasks.generate_tasks_concurrently(
+            model, lambda count: f"Generate {count} tasks", 1000, requests_per_second=0)
+    return run, 1000
+
+@benchmark("clean_tasks_100k")
+def bench_clean_tasks(workdir):
+    # The stub only knows about 2250 titles, so number them to make most lines
+    # distinct while they still share template words. One line in ten repeats
+    # the one before it.
+    tasks = StubModel(seed=SEED).generate_content("Generate 100000 tasks").text.split("\n")
+    lines = [f"{task} ref {i}" for i, task in enumerate(tasks)]
+    lines = [lines[i - 1] if i % 10 == 9 else line for i, line in enumerate(lines)]
+    return lambda: clean_tasks(lines), len(lines)
+
+def _python(workdir, *args):
+    """Return a callable running a fresh interpreter in workdir with the repo importable."""
+    env = dict(os.environ, PYTHONPATH=REPO_DIR)
+    command = [sys.executable, *args]
+    return lambda: subprocess.run(command, cwd=workdir, env=env, check=True, stdout=subprocess.DEVNULL)
+
+@benchmark("startup_pdf_path", target_seconds=PDF_PATH_STARTUP_TARGET)
+def bench_startup_pdf(workdir):
+    path = os.path.join(workdir, "startup.pdf")
+    write_synthetic_pdf(path, 100)
+    # Repeat runs hit the page cache, like re-running on an unchanged to-do.pdf
+    code = ("import importlib; generate_csv = importlib.import_module('generate-csv'); "
+            f"generate_csv.extract_text_from_pdf({path!r}, max_chars=generate_csv.PDF_PROMPT_CHARS)")
+    return _python(workdir, "-c", code), None
+
+@benchmark("startup_csv_path", target_seconds=CSV_PATH_STARTUP_TARGET)
+def bench_startup_csv(workdir):
+    path = os.path.join(workdir, "startup_titles.csv")
+    write_titles_csv(path, 1000)
+    return _python(workdir, os.path.join(REPO_DIR, "main.py"), "--titles", path, "--days", "1",
+                   "--seed", str(SEED), "--output", os.path.join(workdir, "startup.ics"), "--quiet"), None
+
+def measure(run, repeat):
+    """Return the best wall time over repeat runs and the peak traced memory."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+    # Tracing slows everything down, so memory gets its own run
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return min(times), peak
+
+def run_benchmarks(name_filter=None, repeat=3, quick=False):
+    """Run the selected cases and return {name: result}."""
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, setup, slow, target_seconds in BENCHMARKS:
+            if name_filter and name_filter not in name:
+                continue
+            if quick and slow:
+                continue
+            try:
+                run, items = setup(workdir)
+                seconds, peak = measure(run, repeat)
+            except ImportError as e:
+                print(f"{name}: skipped ({e})")
+                continue
+            results[name] = {
+                'seconds': seconds,
+                'peak_kb': peak / 1024,
+                'items_per_second': items / seconds if items and seconds else None,
+                'target_seconds': target_seconds,
+            }
+    return results
+
+def load_baseline(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)['results']
+    except FileNotFoundError:
+        return None
+
+def save_baseline(path, results):
+    data = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Return {name: [messages]} for cases over their target or beyond the baseline tolerance."""
+    regressions = {}
+    for name, result in results.items():
+        messages = []
+        target = result.get('target_seconds')
+        if target and result['seconds'] > target:
+            messages.append(f"over {target * 1000:.0f} ms target")
+        base = (baseline or {}).get(name) or {}
+        for key, label in (('seconds', 'time'), ('peak_kb', 'memory')):
+            if not base.get(key):
+                continue
+            limit = max(base[key] * (1 + tolerance), base[key] + MIN_DELTA[key])
+            if result[key] > limit:
+                messages.append(f"{label} +{(result[key] / base[key] - 1) * 100:.0f}%")
+        if messages:
+            regressions[name] = messages
+    return regressions
+
+def print_results(results, baseline=None, regressions=None):
+    regressions = regressions or {}
+    print(f"{'case':<28} {'time':>10} {'items/s':>12} {'peak mem':>11} {'vs base':>9}")
+    for name, result in results.items():
+        rate = f"{result['items_per_second']:,.0f}" if result['items_per_second'] else "-"
+        change = "-"
+        if baseline and name in baseline and baseline[name]['seconds']:
+            change = f"{(result['seconds'] / baseline[name]['seconds'] - 1) * 100:+.0f}%"
+        flag = "  REGRESSION: " + ", ".join(regressions[name]) if name in regressions else ""
+        print(f"{name:<28} {result['seconds'] * 1000:>8.1f}ms {rate:>12} "
+              f"{result['peak_kb'] / 1024:>8.1f} MB {change:>9}{flag}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run the seeded benchmark suite.")
+    parser.add_argument("--filter", help="only run cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per case (best is kept)")
+    parser.add_argument("--quick", action="store_true", help="skip the slowest cases")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store these results as the baseline instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="allowed slowdown or memory growth before flagging (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    results = run_benchmarks(args.filter, args.repeat, args.quick)
+    if args.save_baseline:
+        print_results(results)
+        save_baseline(args.baseline, results)
+        print(f"\nSaved baseline to {args.baseline}")
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    regressions = compare(results, baseline, args.tolerance)
+    print_results(results, baseline, regressions)
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to create one.")
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%} of the baseline")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
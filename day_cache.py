@@ -0,0 +1,100 @@
+"""Persistent on-disk cache of generated days.
+
+Each day is stored in its own small binary file named after a hash of
+everything that determines its layout: date, seed, scaling factor, titles
+content and generator version. Seeded days come from an independent
+(seed, date) stream, so a cached day is exactly what regenerating it would
+produce, and extending a rolling window only generates the new days.
+
+Reads refresh a file's modification time. When the cache grows past its
+size limit, the least recently used files are deleted first.
+"""
+import os
+import hashlib
+import tempfile
+from array import array
+
+DEFAULT_CACHE_DIR = ".day-cache"
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+class DayCache:
+    """Size-bounded LRU cache of (events, end_of_workday) per day."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self):
+        for shard in os.scandir(self.directory):
+            if shard.is_dir():
+                yield from (entry for entry in os.scandir(shard.path) if entry.name.endswith(".day"))
+
+    @staticmethod
+    def key(current_date, seed, scaling_factor, titles_key, version):
+        """Return the cache key for one generated day."""
+        raw = f"{current_date.isoformat()}|{seed!r}|{scaling_factor!r}|{titles_key}|{version}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".day")
+
+    def get(self, key, event_type):
+        """Return (events, end_of_workday) for key, or None on a miss.
+
+        event_type is called as event_type(start, end, title) per event.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = array("i")
+                data.frombytes(f.read())
+            os.utime(path)  # mark as recently used
+        except (FileNotFoundError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        events = [event_type(data[i], data[i + 1], data[i + 2]) for i in range(1, len(data), 3)]
+        return events, divmod(data[0], 60)
+
+    def put(self, key, events, end_of_workday):
+        """Store a generated day and evict old days if over the size limit."""
+        end_hour, end_minute = end_of_workday
+        data = array("i", [end_hour * 60 + end_minute])
+        for event in events:
+            data.extend((event.start, event.end, event.title))
+        payload = data.tobytes()
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so concurrent workers never see half a day
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(temp_path, path)
+        self._size += len(payload)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self, target_fraction=0.9):
+        """Delete least recently used days until the cache fits in target_fraction of its limit."""
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        self._size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * target_fraction
+        for _, size, path in sorted(entries):
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
@@ -0,0 +1,186 @@
+"""Precomputed library of day layouts for bulk generation.
+
+Most of the cost of a generated day is the three scheduling passes of
+main.generate_day_events(). The template engine runs them ahead of time:
+a template is one generated day stored as its end of workday plus the
+(start, end) minutes of its events, without titles. The library holds
+pool_size templates for every density level the patterns use.
+
+With engine 'templates', each day draws a template of its density level
+from the day's random stream and then draws fresh titles for it, so a day
+costs one lookup plus the title picks. Weighted titles and the no-repeat
+window work as usual. Layouts repeat once a run has more days per level
+than the pool holds, so raise pool_size for long runs. Seeded runs are
+reproducible as long as the library is the same. The library itself is
+built from fixed seeds, so rebuilding with the same pool size and
+generator version gives the same templates.
+
+The library is stored in one binary file and rebuilt automatically when
+its pool size or the generator version does not match.
+
+  python day_templates.py --pool-size 5000
+"""
+import os
+import sys
+import random
+import argparse
+import tempfile
+from array import array
+from functools import lru_cache
+from collections import Counter
+
+import main
+
+DEFAULT_LIBRARY_PATH = ".day-templates"
+DEFAULT_POOL_SIZE = 1000
+FORMAT_VERSION = 1
+LIBRARY_SEED = "day-templates"
+
+def density_levels():
+    """Return every scaling factor the distribution patterns can produce."""
+    return sorted({1.0, *main.progressive_scaling_factors.values(), *main.weekday_scaling_factors.values()})
+
+def _level_key(scaling_factor):
+    return round(scaling_factor * 1000)
+
+class TemplateLibrary:
+    """Day templates grouped by density level."""
+
+    def __init__(self, pool_size, templates, generator_version=main.GENERATOR_VERSION):
+        self.pool_size = pool_size
+        self.generator_version = generator_version
+        # {level key: [(end_of_workday, (start, end, start, end, ...)), ...]}
+        self._templates = templates
+
+    @classmethod
+    def build(cls, pool_size=DEFAULT_POOL_SIZE, levels=None, seed=LIBRARY_SEED):
+        """Generate pool_size templates for every density level."""
+        if pool_size < 1:
+            raise ValueError("Template pool size must be at least 1")
+        placeholder = [""]  # Titles are drawn when a template is used
+        templates = {}
+        for scaling_factor in levels or density_levels():
+            pool = []
+            for i in range(pool_size):
+                rng = random.Random(f"{seed}/{scaling_factor!r}/{i}")
+                events, (end_hour, end_minute) = main.generate_day_events(None, placeholder, rng, scaling_factor)
+                spans = []
+                for event in events:
+                    spans.extend((event.start, event.end))
+                pool.append((end_hour * 60 + end_minute, tuple(spans)))
+            templates[_level_key(scaling_factor)] = pool
+        return cls(pool_size, templates)
+
+    @classmethod
+    def load(cls, path):
+        """Read a library saved with save()."""
+        data = array("i")
+        with open(path, "rb") as f:
+            data.frombytes(f.read())
+        if len(data) < 4 or data[0] != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a day template library")
+        pool_size, level_count = data[2], data[3]
+        templates = {}
+        i = 4
+        for _ in range(level_count):
+            level, count = data[i], data[i + 1]
+            i += 2
+            pool = []
+            for _ in range(count):
+                end_of_workday, length = data[i], data[i + 1]
+                pool.append((end_of_workday, tuple(data[i + 2:i + 2 + length])))
+                i += 2 + length
+            templates[level] = pool
+        return cls(pool_size, templates, data[1])
+
+    def save(self, path):
+        data = array("i", [FORMAT_VERSION, self.generator_version, self.pool_size, len(self._templates)])
+        for level, pool in sorted(self._templates.items()):
+            data.extend((level, len(pool)))
+            for end_of_workday, spans in pool:
+                data.extend((end_of_workday, len(spans)))
+                data.extend(spans)
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        # Write to a temp file first so concurrent workers never read half a library
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data.tobytes())
+        os.replace(temp_path, path)
+
+    def levels(self):
+        """Return the density levels in the library as scaling factors."""
+        return [level / 1000 for level in sorted(self._templates)]
+
+    def templates(self, scaling_factor, end_of_workday=None):
+        """Return the templates of the level closest to scaling_factor.
+
+        With end_of_workday (minutes since midnight), only the templates
+        ending the workday at that time are returned.
+        """
+        key = _level_key(scaling_factor)
+        pool = self._templates.get(key)
+        if pool is None:
+            pool = self._templates[min(self._templates, key=lambda level: abs(level - key))]
+        if end_of_workday is None:
+            return pool
+        return [template for template in pool if template[0] == end_of_workday]
+
+    def generate_day(self, titles, rng, scaling_factor=1.0, event_type=main.Event):
+        """Draw a template for the density level and fill it with titles.
+
+        Returns (events, (end_hour, end_minute)) like main.generate_day_events().
+        """
+        pool = self.templates(scaling_factor)
+        end_of_workday, spans = pool[rng.randrange(len(pool))]
+        pick_title = main.title_sampler(titles, rng)
+        events = [event_type(spans[i], spans[i + 1], pick_title()) for i in range(0, len(spans), 2)]
+        return events, divmod(end_of_workday, 60)
+
+def load_library(path=DEFAULT_LIBRARY_PATH, pool_size=DEFAULT_POOL_SIZE):
+    """Return the library at path, building and saving it first if missing or outdated."""
+    try:
+        stamp = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        stamp = None
+    library = _cached_library(path, pool_size, stamp)
+    if library is None:
+        library = TemplateLibrary.build(pool_size)
+        library.save(path)
+        _cached_library.cache_clear()
+    return library
+
+@lru_cache(maxsize=4)
+def _cached_library(path, pool_size, stamp):
+    if stamp is None:
+        return None
+    try:
+        library = TemplateLibrary.load(path)
+    except ValueError:
+        return None
+    if library.pool_size != pool_size or library.generator_version != main.GENERATOR_VERSION:
+        return None
+    return library
+
+def print_library_stats(library):
+    """Print events per day, distinct layouts and the usual end of workday per level."""
+    print(f"{'level':>6} {'events/day':>11} {'distinct':>9}  most common end of workday")
+    for scaling_factor in library.levels():
+        pool = library.templates(scaling_factor)
+        events = sum(len(spans) // 2 for _, spans in pool) / len(pool)
+        end_of_workday = Counter(end for end, _ in pool).most_common(1)[0][0]
+        print(f"{scaling_factor:>6.1f} {events:>11.2f} {len(set(pool)):>9}  "
+              f"{end_of_workday // 60:02d}:{end_of_workday % 60:02d}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the day template library used by --engine templates.")
+    parser.add_argument("--pool-size", type=int, default=DEFAULT_POOL_SIZE,
+                        help="templates per density level (default: 1000)")
+    parser.add_argument("--output", default=DEFAULT_LIBRARY_PATH, help="library file (default: .day-templates)")
+    args = parser.parse_args()
+    if args.pool_size < 1:
+        sys.exit("Error: template pool size must be at least 1")
+    library = TemplateLibrary.build(args.pool_size)
+    library.save(args.output)
+    print(f"Saved {args.pool_size} templates per level to {args.output} ({os.path.getsize(args.output):,} bytes)")
+    print_library_stats(library)
@@ -0,0 +1,246 @@
+"""Local HTTP server for subscribable calendar feeds.
+
+Serves one feed per user at /calendars/<user>.ics (or /<user>.ics), built
+from the generator for a rolling window that starts today. Each user gets
+their own seeded schedule, so a feed only changes when the window moves
+to the next day.
+
+Built feeds are kept in memory with precomputed ETag and Last-Modified
+headers. A poll with a matching If-None-Match (or an If-Modified-Since that
+is not older than the feed) gets a 304 straight from memory, and a poll
+for an unchanged window never regenerates anything. Feeds are generated
+in a worker thread, once per user and window even when many subscribers
+ask at the same time, and all connections are handled on one asyncio loop.
+
+  python feed_server.py --days 30 --pattern workweek --titles titles.csv
+
+The server binds to 127.0.0.1 by default and needs no network access.
+"""
+import io
+import re
+import sys
+import asyncio
+import hashlib
+import argparse
+import datetime
+import traceback
+import email.utils
+from collections import OrderedDict
+
+import ics_writer
+import main as schedule
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+DEFAULT_DAYS = 30
+DEFAULT_MAX_FEEDS = 256
+REQUEST_TIMEOUT = 10
+MAX_HEADER_LINES = 100
+
+_FEED_PATH = re.compile(r"^/(?:calendars/)?([A-Za-z0-9_.-]+)\.ics$")
+_REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+            405: "Method Not Allowed", 500: "Internal Server Error"}
+
+class Feed:
+    """A generated feed body with its validators and ready-made headers."""
+
+    __slots__ = ("window_start", "body", "etag", "modified", "headers_200", "headers_304")
+
+    def __init__(self, window_start, body, modified, max_age):
+        self.window_start = window_start
+        self.body = body
+        self.etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self.modified = modified
+        validators = (f"ETag: {self.etag}\r\n"
+                      f"Last-Modified: {email.utils.format_datetime(modified, usegmt=True)}\r\n"
+                      f"Cache-Control: max-age={max_age}\r\n")
+        self.headers_200 = (f"HTTP/1.1 200 OK\r\n{validators}"
+                            "Content-Type: text/calendar; charset=utf-8\r\n"
+                            f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode("ascii")
+        self.headers_304 = (f"HTTP/1.1 304 Not Modified\r\n{validators}"
+                            "Connection: close\r\n\r\n").encode("ascii")
+
+    def is_fresh(self, headers):
+        """Return True if the client's conditional headers match this feed."""
+        if_none_match = headers.get("if-none-match")
+        if if_none_match is not None:
+            # If-None-Match takes precedence over If-Modified-Since
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or any(tag.removeprefix("W/") == self.etag for tag in tags)
+        if_modified_since = headers.get("if-modified-since")
+        if if_modified_since:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=datetime.timezone.utc)
+            return self.modified <= since
+        return False
+
+class FeedStore:
+    """Build feeds on demand and keep the most recently used ones in memory."""
+
+    def __init__(self, config, max_feeds=DEFAULT_MAX_FEEDS):
+        self.config = config
+        self.max_feeds = max_feeds
+        self.days = int(config.get('days', DEFAULT_DAYS))
+        self.max_age = int(config.get('max_age', 3600))
+        self.titles = schedule.load_titles(config)
+        self.builds = 0
+        self._feeds = OrderedDict()
+        self._building = {}
+
+    def window_start(self):
+        return datetime.date.today()
+
+    def build(self, user, window_start):
+        """Generate the feed of one user for the window starting at window_start."""
+        # DTSTAMP and Last-Modified are the window start, so rebuilding an
+        # unchanged window (e.g. after a restart) gives the same bytes and ETag
+        modified = datetime.datetime.combine(window_start, datetime.time(0), datetime.timezone.utc)
+        seed = f"{self.config.get('seed', 0)}/{user}"
+        days = schedule.iter_schedule_days(window_start, self.days, self.config.get('pattern', 'even'),
+                                           self.titles, seed, engine=self.config.get('engine', 'python'))
+        buffer = io.BytesIO()
+        writer = ics_writer.IcsWriter(buffer, modified, user)
+        schedule.write_ics_stream(writer, days, self.titles)
+        self.builds += 1
+        return Feed(window_start, buffer.getvalue(), modified, self.max_age)
+
+    async def get(self, user):
+        """Return the current feed of a user, building it at most once per window."""
+        window_start = self.window_start()
+        feed = self._feeds.get(user)
+        if feed is not None and feed.window_start == window_start:
+            self._feeds.move_to_end(user)
+            return feed
+
+        # Concurrent requests for the same feed share one build
+        key = (user, window_start)
+        pending = self._building.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(asyncio.to_thread(self.build, user, window_start))
+            self._building[key] = pending
+            try:
+                feed = await pending
+            finally:
+                del self._building[key]
+            self._feeds[user] = feed
+            self._feeds.move_to_end(user)
+            while len(self._feeds) > self.max_feeds:
+                self._feeds.popitem(last=False)
+            return feed
+        return await asyncio.shield(pending)
+
+class FeedServer:
+    """Minimal HTTP/1.1 server answering GET and HEAD for feed paths."""
+
+    def __init__(self, store):
+        self.store = store
+        self.requests = 0
+        self.not_modified = 0
+        self.errors = 0
+
+    async def handle(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+            headers = {}
+            for _ in range(MAX_HEADER_LINES):
+                line = await asyncio.wait_for(reader.readline(), REQUEST_TIMEOUT)
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            request_line = request_line.decode("latin-1")
+            try:
+                response = await self.respond(request_line, headers)
+            except Exception:
+                # A failed build must not drop the connection without an answer
+                self.errors += 1
+                print(f"Error answering {request_line.strip()!r}:", file=sys.stderr)
+                traceback.print_exc()
+                response = [_error(500)]
+            writer.writelines(response)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def respond(self, request_line, headers):
+        """Return the response to one request as a list of byte chunks."""
+        self.requests += 1
+        parts = request_line.split()
+        if len(parts) != 3:
+            return [_error(400)]
+        method, target, _ = parts
+        if method not in ("GET", "HEAD"):
+            return [_error(405, "Allow: GET, HEAD\r\n")]
+        match = _FEED_PATH.match(target.split("?", 1)[0])
+        if match is None:
+            return [_error(404)]
+
+        feed = await self.store.get(match.group(1))
+        if feed.is_fresh(headers):
+            self.not_modified += 1
+            return [feed.headers_304]
+        if method == "HEAD":
+            return [feed.headers_200]
+        # The body is sent as is, without copying it into the headers
+        return [feed.headers_200, feed.body]
+
+def _error(status, extra_headers=""):
+    body = f"{status} {_REASONS[status]}\n".encode("ascii")
+    return (f"HTTP/1.1 {status} {_REASONS[status]}\r\n{extra_headers}"
+            f"Content-Type: text/plain\r\nContent-Length: {len(body)}\r\n"
+            "Connection: close\r\n\r\n").encode("ascii") + body
+
+async def serve(config, host=DEFAULT_HOST, port=DEFAULT_PORT, max_feeds=DEFAULT_MAX_FEEDS):
+    """Serve feeds until cancelled."""
+    feed_server = FeedServer(FeedStore(config, max_feeds))
+    server = await asyncio.start_server(feed_server.handle, host, port, backlog=1024)
+    print(f"Serving calendar feeds on http://{host}:{port}/calendars/<user>.ics")
+    async with server:
+        await server.serve_forever()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve per-user calendar feeds over HTTP.")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="address to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="port to listen on (default: 8080)")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS, help="days in the rolling window (default: 30)")
+    parser.add_argument("--pattern", choices=schedule.PATTERNS, default="even", help="event distribution pattern")
+    parser.add_argument("--titles", dest="titles_file", help="CSV file with event titles in the first column")
+    parser.add_argument("--title", help="single event title to use when no CSV is given")
+    parser.add_argument("--no-repeat", type=int, default=0,
+                        help="keep a title from repeating within this many draws of a day")
+    parser.add_argument("--seed", default="0", help="base seed; every user gets their own stream")
+    parser.add_argument("--engine", choices=schedule.ENGINES, default="python", help="day generator")
+    parser.add_argument("--max-age", type=int, default=3600, help="Cache-Control max-age in seconds")
+    parser.add_argument("--max-feeds", type=int, default=DEFAULT_MAX_FEEDS,
+                        help="number of feeds kept in memory (default: 256)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    config = {
+        'days': args.days,
+        'pattern': args.pattern,
+        'titles_file': args.titles_file,
+        'titles': [args.title] if args.title else None,
+        'no_repeat': args.no_repeat,
+        'seed': args.seed,
+        'engine': args.engine,
+        'max_age': args.max_age,
+    }
+    try:
+        asyncio.run(serve(config, args.host, args.port, args.max_feeds))
+    except (ValueError, OSError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
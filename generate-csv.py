@@ -1,9 +1,22 @@
 import csv
 import os
-import google.generativeai as genai
-import PyPDF2  # For PDF extraction
-from google.api_core.exceptions import InvalidArgument
+import argparse
 import datetime  # For date handling
+import llm_tasks
+import pdf_text as pdf_extraction
+from task_cleaning import clean_tasks
+from stub_model import StubModel
+import response_cache
+
+# Settings for splitting large requests into concurrent chunks
+generation_options = {
+    'chunk_size': llm_tasks.DEFAULT_CHUNK_SIZE,
+    'requests_per_second': llm_tasks.DEFAULT_REQUESTS_PER_SECOND,
+}
+# Write tasks to the CSV while the response streams in
+stream_output = False
+# The AI prompt only uses the start of the PDF text
+PDF_PROMPT_CHARS = 3000
 
 def get_api_key_from_file(file_path="apikey.google"):
     """Read API key from a file."""
@@ -18,8 +31,12 @@ def get_api_key_from_file(file_path="apikey.google"):
         print(f"Error reading API key: {e}")
         return None
 
-def extract_text_from_pdf(pdf_path):
-    """Extract text content from a PDF file."""
+def extract_text_from_pdf(pdf_path, max_chars=None, first_page=0, last_page=None):
+    """Extract text content from a PDF file, optionally stopping after max_chars.
+
+    first_page and last_page select pages [first_page, last_page), counted
+    from 0; last_page=None reads to the end.
+    """
     if not os.path.exists(pdf_path):
         print(f"PDF file not found: {pdf_path}")
         return None
@@ -29,26 +46,17 @@ def extract_text_from_pdf(pdf_path):
         return None
         
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            
-            if len(pdf_reader.pages) == 0:
-                print("PDF contains no pages")
-                return None
-                
-            # Extract text from each page
-            pdf_text = ""
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                page_text = page.extract_text()
-                if page_text:
-                    pdf_text += page_text + "\n"
+        # Pages are extracted in parallel and cached by file content
+        pdf_text = pdf_extraction.extract_text(pdf_path, first_page, last_page, max_chars=max_chars)
+        
+        if not pdf_text.strip():
+            print("PDF contains no extractable text")
+            return None
             
-            if not pdf_text.strip():
-                print("PDF contains no extractable text")
-                return None
-                
-            return pdf_text
+        return pdf_text
+    except ValueError as e:
+        print(e)
+        return None
     except Exception as e:
         print(f"Error reading PDF: {e}")
         return None
@@ -61,6 +69,8 @@ def setup_genai_api():
         print("API key not found. Please create an 'apikey.google' file with your API key.")
         return None
     
+    # The Gemini SDK is slow to import, so only load it when the API is used
+    import google.generativeai as genai
     genai.configure(api_key=api_key)
     
     # Use the recommended model
@@ -68,9 +78,9 @@ def setup_genai_api():
     print(f"Using model: {model_name}")
     return genai.GenerativeModel(model_name)
 
-def generate_tasks_from_pdf(model, pdf_text, num_tasks=20):
-    """Generate task titles based on content from a PDF file."""
-    prompt = f"""Based on the following content from a to-do list:
+def build_pdf_prompt(pdf_text, num_tasks):
+    """Build the prompt asking for tasks in the style of the PDF content."""
+    return f"""Based on the following content from a to-do list:
 
 {pdf_text[:3000]}  # Limit to 3000 chars to avoid token limits
 
@@ -79,55 +89,51 @@ Each title should be concise (5-8 words) and specific.
 Format as a simple list with one task per line.
 No numbers or bullet points."""
 
+def build_task_prompt(task_type, num_tasks):
+    """Build the prompt asking for tasks of a given type."""
+    return f"""Generate {num_tasks} realistic {task_type} task titles.
+    Each title should be concise (5-8 words) and specific.
+    Format as a simple list, one task per line.
+    No numbers or bullet points."""
+
+def generate_tasks_from_pdf(model, pdf_text, num_tasks=20):
+    """Generate task titles based on content from a PDF file."""
     try:
-        response = model.generate_content(prompt)
-        
-        # Parse the response into individual tasks
-        tasks = []
-        for line in response.text.strip().split('\n'):
-            task = line.strip()
-            # Clean up any bullet points or formatting
-            if task:
-                if task.startswith('- ') or task.startswith('* '):
-                    task = task[2:]
-                elif len(task) > 2 and task[0].isdigit() and task[1:3] in ['. ', ') ']:
-                    task = task[3:]
-                tasks.append(task)
-        
-        return tasks[:num_tasks]  # Ensure we only return the requested number
-    
+        # Large requests are split into concurrent, rate-limited chunks
+        return llm_tasks.generate_tasks_concurrently(
+            model, lambda count: build_pdf_prompt(pdf_text, count), num_tasks, **generation_options)
     except Exception as e:
         print(f"API Error: {e}")
         return []
 
 def generate_tasks(model, task_type, num_tasks=20):
     """Generate task titles using Google's Generative AI."""
-    prompt = f"""Generate {num_tasks} realistic {task_type} task titles.
-    Each title should be concise (5-8 words) and specific.
-    Format as a simple list, one task per line.
-    No numbers or bullet points."""
-    
     try:
-        response = model.generate_content(prompt)
-        
-        # Parse the response into individual tasks
-        tasks = []
-        for line in response.text.strip().split('\n'):
-            task = line.strip()
-            # Clean up any bullet points or formatting
-            if task:
-                if task.startswith('- ') or task.startswith('* '):
-                    task = task[2:]
-                elif len(task) > 2 and task[0].isdigit() and task[1:3] in ['. ', ') ']:
-                    task = task[3:]
-                tasks.append(task)
-        
-        return tasks[:num_tasks]  # Ensure we only return the requested number
-    
+        # Large requests are split into concurrent, rate-limited chunks
+        return llm_tasks.generate_tasks_concurrently(
+            model, lambda count: build_task_prompt(task_type, count), num_tasks, **generation_options)
     except Exception as e:
         print(f"API Error: {e}")
         return []
 
+def stream_tasks_to_csv(model, build_prompt, num_tasks, filename):
+    """Stream generated tasks straight into a CSV file, keeping partial results."""
+    print(f"Streaming tasks to {filename}...")
+    try:
+        tasks = llm_tasks.stream_tasks_to_csv(
+            model, build_prompt, num_tasks, filename, generation_options['chunk_size'])
+    except KeyboardInterrupt:
+        print(f"\nInterrupted. Tasks written so far are kept in {filename}")
+        return []
+    except Exception as e:
+        print(f"API Error: {e}")
+        print(f"Tasks written before the error are kept in {filename}")
+        return []
+    if len(tasks) < num_tasks:
+        print(f"Warning: only {len(tasks)} of {num_tasks} requested tasks were unique")
+    print(f"Successfully saved {len(tasks)} tasks to {filename}")
+    return tasks
+
 def save_to_csv(tasks, filename):
     """Save task titles to a CSV file."""
     with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
@@ -142,30 +148,9 @@ def extract_tasks_directly_from_pdf(pdf_text):
     if not pdf_text:
         return []
         
-    # Split text into lines and clean them up
-    lines = pdf_text.strip().split('\n')
-    tasks = []
-    
-    for line in lines:
-        line = line.strip()
-        # Skip empty lines
-        if not line:
-            continue
-            
-        # Clean up lines that look like tasks
-        # Remove bullet points, numbers, checkboxes, etc.
-        if line.startswith('- ') or line.startswith('* '):
-            line = line[2:]
-        elif line.startswith('□ ') or line.startswith('☐ ') or line.startswith('◻ '):
-            line = line[2:]
-        elif len(line) > 2 and line[0].isdigit() and line[1:3] in ['. ', ') ']:
-            line = line[3:]
-            
-        # Only include lines that aren't too long (likely tasks, not paragraphs)
-        if 5 <= len(line) <= 100:
-            tasks.append(line)
-    
-    return tasks
+    # Strip bullets, numbers and checkboxes, drop duplicates, and only keep
+    # lines that aren't too long (likely tasks, not paragraphs)
+    return clean_tasks(pdf_text.split('\n'), min_length=5, max_length=100)
 
 def save_events_to_csv(events, filename):
     """Save events to a CSV file."""
@@ -192,20 +177,108 @@ def generate_events_from_tasks(tasks, start_date):
     
     return events, current_time
 
-def main():
+def positive_int(value):
+    """argparse type for integers of at least 1."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+def positive_float(value):
+    """argparse type for numbers greater than 0."""
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
+def page_range(value):
+    """argparse type for FIRST-LAST page ranges; either end may be left out.
+
+    Returns (first, last) as 1-based page numbers, with None for a missing end.
+    """
+    first, _, last = value.partition('-')
+    try:
+        first = int(first) if first else None
+        last = int(last) if last else None
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected FIRST-LAST page numbers, got {value}")
+    if (first is not None and first < 1) or (last is not None and last < 1):
+        raise argparse.ArgumentTypeError(f"page numbers start at 1, got {value}")
+    if first is not None and last is not None and last < first:
+        raise argparse.ArgumentTypeError(f"last page comes before first page in {value}")
+    return first, last
+
+def parse_args(argv=None):
+    """Parse the optional command line flags."""
+    parser = argparse.ArgumentParser(description="Generate task titles for the calendar generator.")
+    parser.add_argument("--stub", action="store_true",
+                        help="use a local stub model instead of the Gemini API")
+    parser.add_argument("--chunk-size", type=positive_int, default=llm_tasks.DEFAULT_CHUNK_SIZE,
+                        help="maximum tasks requested per API call")
+    parser.add_argument("--rps", type=positive_float, default=llm_tasks.DEFAULT_REQUESTS_PER_SECOND,
+                        help="maximum API requests per second")
+    parser.add_argument("--stream", action="store_true",
+                        help="write tasks to the CSV as the response streams in")
+    parser.add_argument("--pdf-pages", type=page_range, metavar="FIRST-LAST",
+                        help="only read this page range of the PDF, e.g. 1-20")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="always call the model instead of reusing cached responses")
+    parser.add_argument("--cache-dir", default=response_cache.DEFAULT_CACHE_DIR,
+                        help="directory for cached model responses")
+    parser.add_argument("--cache-ttl-hours", type=float,
+                        default=response_cache.DEFAULT_TTL_SECONDS / 3600,
+                        help="ignore cached responses older than this")
+    parser.add_argument("--cache-max-mb", type=float,
+                        default=response_cache.DEFAULT_MAX_BYTES / (1024 * 1024),
+                        help="size limit of the response cache")
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main function to generate and save task titles."""
+    global stream_output
+    args = parse_args(argv)
+    stream_output = args.stream
+    generation_options['chunk_size'] = args.chunk_size
+    generation_options['requests_per_second'] = args.rps
+    pdf_options = {}
+    if args.pdf_pages:
+        first, last = args.pdf_pages
+        pdf_options = {'first_page': first - 1 if first else 0, 'last_page': last}
+
     print("Task/Event Generator")
     print("---------------------------------------------")
     
     # Setup API
-    try:
-        model = setup_genai_api()
-        if not model:
+    if args.stub:
+        print("Using local stub model")
+        model = StubModel()
+    else:
+        try:
+            model = setup_genai_api()
+            if not model:
+                return
+        except Exception as e:
+            print(f"Error setting up API: {e}")
             return
-    except Exception as e:
-        print(f"Error setting up API: {e}")
-        return
     
+    cache = None
+    if not args.no_cache:
+        cache = response_cache.ResponseCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024),
+                                             args.cache_ttl_hours * 3600)
+        model = response_cache.CachedModel(model, cache)
+    
+    try:
+        run_generation(model, pdf_options)
+    finally:
+        if cache is not None and cache.hits + cache.misses:
+            print(f"Response cache: {cache.hits} hits, {cache.misses} misses")
+
+def run_generation(model, pdf_options=None):
+    """Ask what to generate and write the resulting CSV files.
+
+    pdf_options are passed on to extract_text_from_pdf(), e.g. the page range.
+    """
+    pdf_options = pdf_options or {}
     # Ask user if they want to use the PDF file
     pdf_path = "to-do.pdf"
     print(f"Checking for '{pdf_path}'...")
@@ -221,7 +294,7 @@ def main():
     pdf_text = None
     if use_pdf:
         print(f"Reading content from '{pdf_path}'...")
-        pdf_text = extract_text_from_pdf(pdf_path)
+        pdf_text = extract_text_from_pdf(pdf_path, max_chars=PDF_PROMPT_CHARS, **pdf_options)
         if not pdf_text:
             print("Could not extract usable text from PDF.")
             use_pdf = False
@@ -238,17 +311,20 @@ def main():
         
         # Generate AI tasks based on PDF content
         print(f"Generating {num_tasks} AI-enhanced tasks based on PDF content...")
-        tasks = generate_tasks_from_pdf(model, pdf_text, num_tasks)
-        
-        # Save AI tasks to CSV
         ai_filename = "ai_enhanced_tasks.csv"
-        if tasks:
-            save_to_csv(tasks, ai_filename)
-            print(f"\nSaved {len(tasks)} AI-enhanced tasks to {ai_filename}")
+        if stream_output:
+            tasks = stream_tasks_to_csv(model, lambda count: build_pdf_prompt(pdf_text, count), num_tasks, ai_filename)
+        else:
+            tasks = generate_tasks_from_pdf(model, pdf_text, num_tasks)
+            
+            # Save AI tasks to CSV
+            if tasks:
+                save_to_csv(tasks, ai_filename)
+                print(f"\nSaved {len(tasks)} AI-enhanced tasks to {ai_filename}")
         
         # Extract direct tasks from PDF and save to timeblock CSV
         print("\nExtracting tasks directly from PDF for time blocking...")
-        direct_tasks = extract_tasks_directly_from_pdf(pdf_text)
+        direct_tasks = extract_tasks_directly_from_pdf(extract_text_from_pdf(pdf_path, **pdf_options))
         
         if direct_tasks:
             timeblock_filename = "timeblock_tasks.csv"
@@ -295,10 +371,14 @@ def main():
         filename = input(f"Enter output filename [{default_filename}]: ") or default_filename
         
         print(f"Generating {num_tasks} {task_type} tasks...")
-        tasks = generate_tasks(model, task_type, num_tasks)
+        if stream_output:
+            tasks = stream_tasks_to_csv(model, lambda count: build_task_prompt(task_type, count), num_tasks, filename)
+        else:
+            tasks = generate_tasks(model, task_type, num_tasks)
+            if tasks:
+                save_to_csv(tasks, filename)
         
         if tasks:
-            save_to_csv(tasks, filename)
             
             # Preview tasks
             print("\nPreview of generated tasks:")
@@ -0,0 +1,281 @@
+"""Per-day metrics for generated or imported .ics files.
+
+  python ics_analytics.py _example-ics-files
+  python ics_analytics.py calendars/ --group offset --format jsonl --workers 0
+
+Every day is measured in one sweep over its sorted start and end points:
+
+* busy coverage: minutes covered by at least one event, also as a share
+  of the day's span from its first start to its last end
+* maximum overlap depth
+* gaps between busy blocks, with a size histogram
+* event lengths as a histogram
+* title repetition: events whose title already appeared that day, and the
+  count of the most frequent title
+
+The summary averages events and busy time per weekday (or per day offset
+from the first date of each file with --group offset) and shows them
+relative to the busiest group. That makes density patterns easy to check:
+a workweek schedule should come out near 80/100/90/100/60 from Monday to
+Friday, a progressive one should fall off after the second day.
+
+Files are parsed with ics_import, so cancelled events are skipped. All-day
+events are counted separately and left out of the metrics. Events that
+run past midnight are cut off at the end of their start date.
+"""
+import os
+import sys
+import json
+import argparse
+import datetime
+from collections import Counter, defaultdict
+
+import ics_import
+
+FORMATS = ("table", "jsonl")
+GROUPS = ("weekday", "offset")
+# Upper bounds in minutes; each histogram has one more bucket for longer values
+LENGTH_BUCKETS = (15, 30, 45, 60, 90, 120, 180, 240)
+GAP_BUCKETS = (5, 15, 30, 60, 120)
+MINUTES_PER_DAY = 24 * 60
+
+def bucket_labels(bounds):
+    return [f"<={bound}" for bound in bounds] + [f">{bounds[-1]}"]
+
+def histogram(values, bounds):
+    """Count values per bucket; bounds are the inclusive upper bounds."""
+    counts = [0] * (len(bounds) + 1)
+    for value in values:
+        i = 0
+        while i < len(bounds) and value > bounds[i]:
+            i += 1
+        counts[i] += 1
+    return counts
+
+def sweep(intervals):
+    """Sweep sorted start and end points of (start, end) minute intervals.
+
+    Returns (busy_minutes, max_depth, gaps) where gaps are the lengths of
+    the free stretches between busy blocks. Ends sort before starts at the
+    same minute, so back-to-back events don't count as overlapping.
+    """
+    points = [(start, 1) for start, _ in intervals]
+    points.extend((end, -1) for _, end in intervals)
+    points.sort()
+    depth = max_depth = busy = 0
+    block_start = last_end = None
+    gaps = []
+    for minute, step in points:
+        if step > 0:
+            if depth == 0:
+                if last_end is not None and minute > last_end:
+                    gaps.append(minute - last_end)
+                block_start = minute
+            depth += 1
+            if depth > max_depth:
+                max_depth = depth
+        else:
+            depth -= 1
+            if depth == 0:
+                busy += minute - block_start
+                last_end = minute
+    return busy, max_depth, gaps
+
+def analyze_day(current_date, events):
+    """Return the metrics of one day as a dict; events are (start, end, title) in minutes."""
+    intervals = [(start, end) for start, end, _ in events if end > start]
+    busy, max_depth, gaps = sweep(intervals)
+    span = max(end for _, end in intervals) - min(start for start, _ in intervals) if intervals else 0
+    titles = Counter(title for _, _, title in events)
+    return {
+        'date': current_date.isoformat(),
+        'events': len(events),
+        'busy_minutes': busy,
+        'span_minutes': span,
+        'coverage': round(busy / span, 4) if span else 0.0,
+        'max_depth': max_depth,
+        'gaps': len(gaps),
+        'gap_minutes': sum(gaps),
+        'gap_histogram': histogram(gaps, GAP_BUCKETS),
+        'length_histogram': histogram([end - start for start, end, _ in events], LENGTH_BUCKETS),
+        'repeated_titles': len(events) - len(titles),
+        'top_title_count': max(titles.values()) if titles else 0,
+    }
+
+def analyze_file(path):
+    """Return (day metrics in date order, number of all-day events) for one .ics file."""
+    days = defaultdict(list)
+    all_day = 0
+    for event in ics_import.iter_events(path):
+        if event.all_day:
+            all_day += 1
+            continue
+        start = event.start.hour * 60 + event.start.minute
+        if event.end.date() > event.start.date():
+            end = MINUTES_PER_DAY
+        else:
+            end = event.end.hour * 60 + event.end.minute
+        days[event.start.date()].append((start, end, event.summary))
+    return [analyze_day(current_date, days[current_date]) for current_date in sorted(days)], all_day
+
+class Summary:
+    """Totals over many analyzed days, grouped by weekday or day offset."""
+
+    def __init__(self, group="weekday"):
+        if group not in GROUPS:
+            raise ValueError(f"Unknown group '{group}', expected one of {', '.join(GROUPS)}")
+        self.group = group
+        self.files = 0
+        self.days = 0
+        self.events = 0
+        self.all_day = 0
+        self.busy_minutes = 0
+        self.span_minutes = 0
+        self.repeated_titles = 0
+        self.depths = Counter()
+        self.gap_histogram = [0] * (len(GAP_BUCKETS) + 1)
+        self.length_histogram = [0] * (len(LENGTH_BUCKETS) + 1)
+        self._groups = defaultdict(lambda: [0, 0, 0])  # days, events, busy minutes
+
+    def add_file(self, days, all_day=0):
+        self.files += 1
+        self.all_day += all_day
+        first = datetime.date.fromisoformat(days[0]['date']) if days else None
+        for day in days:
+            self.days += 1
+            self.events += day['events']
+            self.busy_minutes += day['busy_minutes']
+            self.span_minutes += day['span_minutes']
+            self.repeated_titles += day['repeated_titles']
+            self.depths[day['max_depth']] += 1
+            for i, count in enumerate(day['gap_histogram']):
+                self.gap_histogram[i] += count
+            for i, count in enumerate(day['length_histogram']):
+                self.length_histogram[i] += count
+            current_date = datetime.date.fromisoformat(day['date'])
+            if self.group == "weekday":
+                key = current_date.weekday()
+            else:
+                key = (current_date - first).days
+            totals = self._groups[key]
+            totals[0] += 1
+            totals[1] += day['events']
+            totals[2] += day['busy_minutes']
+
+    def groups(self):
+        """Return per-group means, with each mean relative to the largest group mean."""
+        means = {key: (days, events / days, busy / days)
+                 for key, (days, events, busy) in sorted(self._groups.items())}
+        top_events = max((events for _, events, _ in means.values()), default=0) or 1
+        top_busy = max((busy for _, _, busy in means.values()), default=0) or 1
+        rows = []
+        for key, (days, events, busy) in means.items():
+            rows.append({
+                'group': datetime.date(2024, 1, 1 + key).strftime('%A') if self.group == "weekday" else key,
+                'days': days,
+                'events_per_day': round(events, 2),
+                'events_relative': round(events / top_events, 3),
+                'busy_minutes_per_day': round(busy, 1),
+                'busy_relative': round(busy / top_busy, 3),
+            })
+        return rows
+
+    def to_dict(self):
+        return {
+            'type': 'summary',
+            'files': self.files,
+            'days': self.days,
+            'events': self.events,
+            'all_day_events': self.all_day,
+            'events_per_day': round(self.events / self.days, 2) if self.days else 0,
+            'coverage': round(self.busy_minutes / self.span_minutes, 4) if self.span_minutes else 0.0,
+            'repeated_titles': self.repeated_titles,
+            'max_depth': dict(sorted(self.depths.items())),
+            'gap_histogram': dict(zip(bucket_labels(GAP_BUCKETS), self.gap_histogram)),
+            'length_histogram': dict(zip(bucket_labels(LENGTH_BUCKETS), self.length_histogram)),
+            'groups': self.groups(),
+        }
+
+    def format_table(self):
+        summary = self.to_dict()
+        lines = [
+            f"{summary['files']} file(s), {summary['days']} days, {summary['events']} events "
+            f"({summary['events_per_day']} per day, {summary['all_day_events']} all-day skipped)",
+            f"coverage of scheduled span: {summary['coverage'] * 100:.1f}%, "
+            f"repeated titles: {summary['repeated_titles']}",
+            "",
+            f"{self.group:<10} {'days':>6} {'events/day':>11} {'rel':>6} {'busy min/day':>13} {'rel':>6}",
+        ]
+        for row in summary['groups']:
+            lines.append(f"{row['group']!s:<10} {row['days']:>6} {row['events_per_day']:>11.2f} "
+                         f"{row['events_relative'] * 100:>5.0f}% {row['busy_minutes_per_day']:>13.1f} "
+                         f"{row['busy_relative'] * 100:>5.0f}%")
+        for title, counts in (("max overlap depth", summary['max_depth']),
+                              ("gap minutes", summary['gap_histogram']),
+                              ("event minutes", summary['length_histogram'])):
+            lines.append("")
+            lines.append(f"{title}:")
+            total = sum(counts.values()) or 1
+            for label, count in counts.items():
+                lines.append(f"  {label!s:>6} {count:>9} {count / total * 100:>6.1f}%")
+        return "\n".join(lines) + "\n"
+
+def _analyze_job(path):
+    return path, *analyze_file(path)
+
+def iter_results(paths, workers=1):
+    """Yield (path, days, all_day) per file, in the order of paths."""
+    if workers == 1 or len(paths) < 2:
+        for path in paths:
+            yield _analyze_job(path)
+        return
+    workers = min(workers or os.cpu_count() or 1, len(paths))
+    chunksize = max(1, len(paths) // (workers * 4))
+    # Loaded here so single-file runs don't pay for importing multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_analyze_job, paths, chunksize=chunksize)
+
+def analyze(paths, group="weekday", workers=1, day_records=None):
+    """Analyze .ics files (or directories of them) and return a Summary.
+
+    day_records, if given, is called with (path, day) for every day.
+    """
+    summary = Summary(group)
+    for path, days, all_day in iter_results(ics_import.expand_paths(paths), workers):
+        if day_records is not None:
+            for day in days:
+                day_records(path, day)
+        summary.add_file(days, all_day)
+    return summary
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Per-day sweep-line metrics for .ics files.")
+    parser.add_argument("paths", nargs="+", help=".ics files or directories containing them")
+    parser.add_argument("--group", choices=GROUPS, default="weekday",
+                        help="average per weekday or per day offset from each file's first date")
+    parser.add_argument("--format", choices=FORMATS, default="table",
+                        help="summary table, or JSON lines with one record per day and a summary")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes for many files (0 = one per CPU core, default: 1)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    day_records = None
+    if args.format == "jsonl":
+        def day_records(path, day):
+            sys.stdout.write(json.dumps({'type': 'day', 'file': path, **day}) + "\n")
+    try:
+        summary = analyze(args.paths, args.group, args.workers or None, day_records)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if args.format == "jsonl":
+        sys.stdout.write(json.dumps(summary.to_dict()) + "\n")
+    else:
+        sys.stdout.write(summary.format_table())
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+"""Incremental ICS updates.
+
+Instead of a complete VCALENDAR, an update run writes only the VEVENTs that
+changed since the previous run:
+
+* added: slots that did not exist before
+* modified: same slot, different time or title. These keep their UID, get
+  SEQUENCE bumped and a new DTSTAMP.
+* cancelled: slots inside the new window (first to last generated date)
+  that are no longer generated. They are sent with STATUS:CANCELLED and a
+  bumped SEQUENCE.
+
+Cancelled slots stay in the state with their last SEQUENCE. When such a
+slot is generated again, it is added under its old UID with the next
+SEQUENCE, so clients take it over the cancellation.
+
+A slot is the nth event of a date. Its UID is assigned when the slot first
+appears and then stays the same, so clients update events in place. The
+previous run is kept in a small JSON state file next to the output. Slots
+dated outside the new window are neither written nor cancelled; they stay
+in the state as they are, so a later run covering them keeps their UIDs.
+
+Seeded schedules make deltas small: unchanged days regenerate identically,
+so a rolling daily update adds the new day and nothing else.
+"""
+import os
+import json
+import tempfile
+
+from ics_writer import PRODID, UID_DOMAIN, _HHMM, format_dtstamp, summary_line
+
+def load_state(path):
+    """Return {slot: [uid, sequence, start, end, title]} from a state file, or {}.
+
+    The title of a cancelled slot is None.
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)['events']
+    except FileNotFoundError:
+        return {}
+
+def save_state(path, events):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump({'events': events}, f, separators=(",", ":"))
+    os.replace(temp_path, path)
+
+def format_vevent(uid, date_stamp, start, end, title, dtstamp, sequence, cancelled=False):
+    """Return one encoded VEVENT with SEQUENCE (and STATUS when cancelled)."""
+    status = "STATUS:CANCELLED\r\n" if cancelled else ""
+    return (f"BEGIN:VEVENT\r\nUID:{uid}\r\nDTSTAMP:{dtstamp}\r\nSEQUENCE:{sequence}\r\n{status}"
+            f"DTSTART:{date_stamp}T{_HHMM[start]}00\r\n"
+            f"DTEND:{date_stamp}T{_HHMM[end]}00\r\n").encode("ascii") + summary_line(title) + b"END:VEVENT\r\n"
+
+class DeltaWriter:
+    """Compare generated days against the previous state and write the changes.
+
+    Has the same interface as ics_writer.IcsWriter, so it plugs into
+    main.write_ics_stream(). After end(), state holds the slots to save.
+    """
+
+    def __init__(self, f, state, dtstamp=None, user=None, uid_domain=UID_DOMAIN):
+        self.f = f
+        self.previous = state
+        self.state = {}
+        self.dtstamp = format_dtstamp(dtstamp)
+        self.uid_suffix = f"-{user}@{uid_domain}" if user else f"@{uid_domain}"
+        self.added = 0
+        self.modified = 0
+        self.cancelled = 0
+        self.unchanged = 0
+        self.first_date = None
+        self.last_date = None
+
+    @property
+    def event_count(self):
+        """Number of VEVENTs written."""
+        return self.added + self.modified + self.cancelled
+
+    def begin(self):
+        self.f.write(f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:{PRODID}\r\nMETHOD:PUBLISH\r\n".encode("ascii"))
+
+    def format_day(self, current_date, events, titles):
+        """Diff one day against the previous state; return its added and modified VEVENTs."""
+        if self.first_date is None:
+            self.first_date = current_date
+        self.last_date = current_date
+        date_stamp = current_date.strftime('%Y%m%d')
+        chunks = []
+        for position, event in enumerate(events, 1):
+            slot = f"{date_stamp}-{position}"
+            title = titles[event.title]
+            previous = self.previous.pop(slot, None)
+            if previous is None:
+                uid = f"{date_stamp}T{_HHMM[event.start]}-{position}{self.uid_suffix}"
+                sequence = 0
+                self.added += 1
+            elif previous[4] is None:
+                # Cancelled earlier: the UID is known to clients, so continue its SEQUENCE
+                uid, sequence = previous[0], previous[1] + 1
+                self.added += 1
+            else:
+                uid, sequence, start, end, old_title = previous
+                if (start, end, old_title) == (event.start, event.end, title):
+                    self.state[slot] = previous
+                    self.unchanged += 1
+                    continue
+                sequence += 1
+                self.modified += 1
+            self.state[slot] = [uid, sequence, event.start, event.end, title]
+            chunks.append(format_vevent(uid, date_stamp, event.start, event.end, title, self.dtstamp, sequence))
+        return chunks
+
+    def write_chunks(self, chunks, event_count):
+        self.f.writelines(chunks)
+
+    def write_day(self, current_date, events, titles):
+        """Write the added and modified events of one day."""
+        self.write_chunks(self.format_day(current_date, events, titles), len(events))
+
+    def end(self):
+        """Cancel slots of the window that were not generated again, then close the calendar."""
+        first_stamp = self.first_date.strftime('%Y%m%d') if self.first_date else None
+        last_stamp = self.last_date.strftime('%Y%m%d') if self.last_date else None
+        chunks = []
+        for slot, previous in sorted(self.previous.items()):
+            uid, sequence, start, end, title = previous
+            date_stamp = slot.split("-", 1)[0]
+            if title is None or first_stamp is None or not first_stamp <= date_stamp <= last_stamp:
+                self.state[slot] = previous  # Already cancelled or outside the window: keep it untouched
+                continue
+            chunks.append(format_vevent(uid, date_stamp, start, end, title, self.dtstamp, sequence + 1,
+                                        cancelled=True))
+            self.state[slot] = [uid, sequence + 1, start, end, None]
+            self.cancelled += 1
+        self.f.writelines(chunks)
+        self.f.write(b"END:VCALENDAR\r\n")
@@ -0,0 +1,313 @@
+"""Read existing .ics exports as busy time.
+
+The parser walks the file through an mmap one content line at a time, so
+exports with tens of thousands of events are never loaded into Python
+strings as a whole. Only the properties needed for scheduling are kept:
+DTSTART, DTEND or DURATION, SUMMARY, STATUS and TRANSP.
+
+* Times with a Z suffix or a TZID parameter are converted to local time.
+  Floating times and unknown TZIDs are taken as they are.
+* Cancelled events are skipped. All-day and transparent ("free") events
+  are parsed but don't count as busy.
+* Recurring events are read as their first occurrence; RRULEs are not
+  expanded.
+* Events with unreadable times are skipped.
+
+Run this module to check the parser against a small built-in calendar.
+
+BusyIndex keeps the imported busy time as one intervals.IntervalIndex per
+date in minutes since midnight, so checking a slot is a dict lookup plus
+a binary search.
+"""
+import io
+import os
+import re
+import mmap
+import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo
+
+from intervals import IntervalIndex
+
+MINUTES_PER_DAY = 24 * 60
+
+_WANTED = {b"DTSTART", b"DTEND", b"DURATION", b"SUMMARY", b"STATUS", b"TRANSP"}
+_DURATION = re.compile(r"^([+-])?P(?:(\d+)W)?(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+# params arrive without the property name, so TZID may be the first parameter
+_TZID = re.compile(rb'(?:^|;)TZID="?([^";:]+)"?', re.IGNORECASE)
+_UNESCAPE = re.compile(r"\\([\\;,nN])")
+
+class ImportedEvent:
+    """One VEVENT of an imported calendar.
+
+    start and end are naive local datetimes, or dates for all-day events.
+    """
+    __slots__ = ('start', 'end', 'summary', 'transparent')
+
+    def __init__(self, start, end, summary, transparent=False):
+        self.start = start
+        self.end = end
+        self.summary = summary
+        self.transparent = transparent
+
+    @property
+    def all_day(self):
+        return not isinstance(self.start, datetime.datetime)
+
+    def __repr__(self):
+        return f"ImportedEvent({self.start} - {self.end}, {self.summary!r})"
+
+def iter_content_lines(f):
+    """Yield the unfolded content lines of a binary file or mmap, without line endings."""
+    pending = None
+    for line in iter(f.readline, b""):
+        if line[:1] in (b" ", b"\t"):
+            # Folded continuation of the previous line
+            if pending is not None:
+                pending += line[1:].rstrip(b"\r\n")
+            continue
+        if pending is not None:
+            yield pending
+        pending = line.rstrip(b"\r\n")
+    if pending is not None:
+        yield pending
+
+def iter_events(path):
+    """Yield an ImportedEvent for every VEVENT of an .ics file."""
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            yield from parse_events(iter_content_lines(mm))
+
+def parse_events(lines):
+    """Yield an ImportedEvent for every VEVENT in an iterable of unfolded byte lines."""
+    properties = None
+    nested = 0  # Depth of components inside the current VEVENT, e.g. VALARM
+    for line in lines:
+        name, _, value = line.partition(b":")
+        # Only the name is case-insensitive; TZID values are not
+        key, _, params = name.partition(b";")
+        key = key.upper()
+        if key == b"BEGIN":
+            if properties is not None:
+                nested += 1
+            elif value.strip().upper() == b"VEVENT":
+                properties = {}
+        elif key == b"END":
+            if nested:
+                nested -= 1
+            elif properties is not None:
+                event = _build_event(properties)
+                if event is not None:
+                    yield event
+                properties = None
+        elif properties is not None and not nested and key in _WANTED:
+            properties[key] = (params, value)
+
+def _build_event(properties):
+    status = properties.get(b"STATUS")
+    if status is not None and status[1].strip().upper() == b"CANCELLED":
+        return None
+    if b"DTSTART" not in properties:
+        return None
+    try:
+        start = parse_time(*properties[b"DTSTART"])
+        if b"DTEND" in properties:
+            end = parse_time(*properties[b"DTEND"])
+        elif b"DURATION" in properties:
+            end = start + parse_duration(properties[b"DURATION"][1].decode("ascii").strip())
+        else:
+            # RFC 5545: a date lasts one day, a date-time has no duration
+            end = start if isinstance(start, datetime.datetime) else start + datetime.timedelta(days=1)
+    except (ValueError, UnicodeDecodeError):
+        return None
+    summary = properties.get(b"SUMMARY")
+    summary = unescape(summary[1].decode("utf-8", "replace").strip()) if summary else ""
+    transp = properties.get(b"TRANSP")
+    transparent = transp is not None and transp[1].strip().upper() == b"TRANSPARENT"
+    return ImportedEvent(start, end, summary, transparent)
+
+def unescape(text):
+    """Undo RFC 5545 TEXT escaping."""
+    if "\\" not in text:
+        return text
+    return _UNESCAPE.sub(lambda match: "\n" if match.group(1) in "nN" else match.group(1), text)
+
+@lru_cache(maxsize=64)
+def _zone(tzid):
+    try:
+        return ZoneInfo(tzid)
+    except (ValueError, KeyError, OSError):
+        return None  # e.g. Windows zone names; treated as floating time
+
+def parse_time(params, value):
+    """Parse a DATE or DATE-TIME value into a date or a naive local datetime."""
+    text = value.strip().decode("ascii")
+    if len(text) == 8:
+        return datetime.date(int(text[0:4]), int(text[4:6]), int(text[6:8]))
+    if len(text) < 15 or text[8] != "T":
+        raise ValueError(f"Invalid date-time '{text}'")
+    moment = datetime.datetime(int(text[0:4]), int(text[4:6]), int(text[6:8]),
+                               int(text[9:11]), int(text[11:13]), int(text[13:15]))
+    if text.endswith("Z"):
+        zone = datetime.timezone.utc
+    else:
+        match = _TZID.search(params)
+        zone = _zone(match.group(1).decode("utf-8", "replace")) if match else None
+    if zone is not None:
+        moment = moment.replace(tzinfo=zone).astimezone().replace(tzinfo=None)
+    return moment
+
+def parse_duration(text):
+    """Parse an RFC 5545 DURATION such as PT1H30M into a timedelta."""
+    match = _DURATION.match(text)
+    if match is None or text in ("P", "PT"):
+        raise ValueError(f"Invalid duration '{text}'")
+    sign, weeks, days, hours, minutes, seconds = match.groups()
+    delta = datetime.timedelta(weeks=int(weeks or 0), days=int(days or 0), hours=int(hours or 0),
+                               minutes=int(minutes or 0), seconds=int(seconds or 0))
+    return -delta if sign == "-" else delta
+
+def expand_paths(paths):
+    """Return the .ics files named by paths, replacing directories by the .ics files in them."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                if name.lower().endswith(".ics")))
+        else:
+            files.append(path)
+    return files
+
+class BusyIndex:
+    """Busy time of imported calendars as an IntervalIndex of minutes per date."""
+
+    def __init__(self):
+        self._days = {}
+        self.events = 0
+        self.ignored = 0  # All-day and transparent events
+
+    def __len__(self):
+        """Number of dates with busy time."""
+        return len(self._days)
+
+    def get(self, current_date):
+        """Return the IntervalIndex of a date, or None if it has no busy time."""
+        return self._days.get(current_date)
+
+    def add_event(self, event):
+        if event.all_day or event.transparent:
+            self.ignored += 1
+            return
+        self.events += 1
+        self.add(event.start, event.end)
+
+    def add(self, start, end):
+        """Mark [start, end) busy, splitting it at midnight."""
+        if end <= start:
+            return
+        current_date = start.date()
+        day_start = start.hour * 60 + start.minute
+        last_date = end.date()
+        while True:
+            if current_date == last_date:
+                day_end = end.hour * 60 + end.minute + (end.second > 0)
+            else:
+                day_end = MINUTES_PER_DAY
+            if day_end > day_start:
+                index = self._days.get(current_date)
+                if index is None:
+                    index = self._days[current_date] = IntervalIndex()
+                index.add(day_start, day_end)
+            if current_date >= last_date:
+                break
+            current_date += datetime.timedelta(days=1)
+            day_start = 0
+
+def build_busy_index(paths):
+    """Parse .ics files (or directories of them) into a BusyIndex."""
+    busy = BusyIndex()
+    for path in expand_paths(paths):
+        for event in iter_events(path):
+            busy.add_event(event)
+    return busy
+
+def load_busy_index(paths):
+    """Like build_busy_index(), but reuse the index while the files are unchanged.
+
+    Batch runs that schedule many calendars around the same exports parse
+    them once per process.
+    """
+    files = tuple(expand_paths(paths))
+    stamps = tuple((stat.st_mtime_ns, stat.st_size) for stat in map(os.stat, files))
+    return _cached_busy_index(files, stamps)
+
+@lru_cache(maxsize=8)
+def _cached_busy_index(files, stamps):
+    return build_busy_index(files)
+
+_CHECK_CALENDAR = b"""BEGIN:VCALENDAR\r
+BEGIN:VEVENT\r
+DTSTART;TZID=America/New_York:20250310T090000\r
+DTEND;TZID="America/New_York":20250310T100000\r
+SUMMARY:Zoned\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+DTSTART;VALUE=DATE-TIME;TZID=Europe/Berlin:20250310T090000\r
+DURATION:PT30M\r
+SUMMARY:Second\r
+  parameter\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+DTSTART:20250310T120000Z\r
+DTEND:20250310T130000Z\r
+SUMMARY:UTC\\, escaped\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+DTSTART:20250310T140000\r
+DTEND:20250310T150000\r
+SUMMARY:Floating\r
+BEGIN:VALARM\r
+DTSTART:bad\r
+END:VALARM\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+DTSTART;VALUE=DATE:20250311\r
+SUMMARY:All day\r
+END:VEVENT\r
+BEGIN:VEVENT\r
+STATUS:CANCELLED\r
+DTSTART:20250310T160000\r
+DTEND:20250310T170000\r
+END:VEVENT\r
+END:VCALENDAR\r
+"""
+
+def check_parser():
+    """Parse a small calendar covering each supported form and compare with the expected events.
+
+    Returns (passed, rows) where rows holds (summary, expected, parsed).
+    """
+    def local(year, month, day, hour, minute, zone):
+        moment = datetime.datetime(year, month, day, hour, minute, tzinfo=zone)
+        return moment.astimezone().replace(tzinfo=None)
+
+    new_york, berlin, utc = ZoneInfo("America/New_York"), ZoneInfo("Europe/Berlin"), datetime.timezone.utc
+    expected = [
+        ("Zoned", local(2025, 3, 10, 9, 0, new_york), local(2025, 3, 10, 10, 0, new_york)),
+        ("Second parameter", local(2025, 3, 10, 9, 0, berlin), local(2025, 3, 10, 9, 30, berlin)),
+        ("UTC, escaped", local(2025, 3, 10, 12, 0, utc), local(2025, 3, 10, 13, 0, utc)),
+        ("Floating", datetime.datetime(2025, 3, 10, 14, 0), datetime.datetime(2025, 3, 10, 15, 0)),
+        ("All day", datetime.date(2025, 3, 11), datetime.date(2025, 3, 12)),
+    ]
+    parsed = [(event.summary, event.start, event.end)
+              for event in parse_events(iter_content_lines(io.BytesIO(_CHECK_CALENDAR)))]
+    rows = [(want[0], want, got) for want, got in zip(expected, parsed + [None] * len(expected))]
+    return parsed == expected, rows
+
+if __name__ == "__main__":
+    passed, rows = check_parser()
+    for summary, want, got in rows:
+        print(f"{'OK ' if want == got else 'BAD'} {summary}: expected {want[1:]}, parsed {got and got[1:]}")
+    raise SystemExit(0 if passed else 1)
@@ -0,0 +1,96 @@
+"""Incremental busy-time index for a single day.
+
+IntervalIndex keeps the union of all added intervals as disjoint, sorted
+busy blocks, plus the free gaps between consecutive blocks in a list sorted
+by (length, start). Adding an interval and finding a gap of at least N
+minutes are binary searches instead of re-sorting every event and
+rescanning all adjacent pairs.
+"""
+from bisect import bisect_left, bisect_right, insort
+
+class IntervalIndex:
+    """Sorted busy blocks with a size-ordered list of the gaps between them."""
+
+    __slots__ = ('_starts', '_ends', '_gaps')
+
+    def __init__(self, intervals=()):
+        self._starts = []
+        self._ends = []
+        self._gaps = []  # (length, gap_start) of every gap between two blocks
+        for start, end in intervals:
+            self.add(start, end)
+
+    def copy(self):
+        """Return an independent copy of the index."""
+        index = IntervalIndex()
+        index._starts = self._starts[:]
+        index._ends = self._ends[:]
+        index._gaps = self._gaps[:]
+        return index
+
+    def __len__(self):
+        """Number of disjoint busy blocks."""
+        return len(self._starts)
+
+    def _remove_gap(self, k):
+        # Gap between block k and block k + 1
+        key = (self._starts[k + 1] - self._ends[k], self._ends[k])
+        del self._gaps[bisect_left(self._gaps, key)]
+
+    def _insert_gap(self, k):
+        insort(self._gaps, (self._starts[k + 1] - self._ends[k], self._ends[k]))
+
+    def add(self, start, end):
+        """Mark [start, end) as busy, merging it with overlapping or touching blocks."""
+        starts, ends = self._starts, self._ends
+        # Blocks i..j-1 overlap or touch the new interval
+        i = bisect_left(ends, start)
+        j = bisect_right(starts, end)
+        if i < j:
+            start = min(start, starts[i])
+            end = max(end, ends[j - 1])
+
+        # Every gap that borders a replaced block disappears or changes size
+        for k in range(max(i - 1, 0), min(j, len(starts) - 1)):
+            self._remove_gap(k)
+        starts[i:j] = [start]
+        ends[i:j] = [end]
+        if i > 0:
+            self._insert_gap(i - 1)
+        if i + 1 < len(starts):
+            self._insert_gap(i)
+
+    def is_free(self, start, end):
+        """Return True if [start, end) does not overlap any busy block."""
+        i = bisect_right(self._ends, start)
+        return i == len(self._starts) or self._starts[i] >= end
+
+    def next_free(self, start, length, limit):
+        """Return the earliest t >= start where [t, t + length) is free and ends by limit.
+
+        A binary search over the block starts finds the block before start.
+        From there the walk only steps forward over gaps that are too short,
+        and stops once limit is passed. Returns None if nothing fits.
+        """
+        starts, ends = self._starts, self._ends
+        i = bisect_left(starts, start)
+        if i and ends[i - 1] > start:
+            start = ends[i - 1]
+        while start + length <= limit:
+            if i == len(starts) or starts[i] >= start + length:
+                return start
+            start = ends[i]
+            i += 1
+        return None
+
+    def choose_gap(self, min_length, rng):
+        """Pick a random gap of at least min_length minutes as (start, end).
+
+        Every qualifying gap is equally likely. Returns None when no gap is
+        long enough.
+        """
+        i = bisect_left(self._gaps, (min_length, float('-inf')))
+        if i == len(self._gaps):
+            return None
+        length, gap_start = self._gaps[i + rng.randrange(len(self._gaps) - i)]
+        return gap_start, gap_start + length
@@ -0,0 +1,186 @@
+"""Concurrent, chunked task generation against a generative model.
+
+Large requests are split into chunks of at most chunk_size tasks, and the
+chunks run concurrently on asyncio. A shared rate limiter spaces out
+request starts to the configured requests per second. Failed requests are
+retried with exponential backoff and jitter, and the chunk results are
+merged in order with exact and near duplicates removed (see task_cleaning).
+
+stream_tasks() instead parses streamed responses line by line, so tasks
+can be written out while the model is still generating.
+
+Any object with generate_content(prompt) returning something with a .text
+attribute works as a model; generate_content_async is used when present.
+stub_model.StubModel stands in for the Gemini API in tests and benchmarks.
+"""
+import asyncio
+import random
+import time
+import csv
+from task_cleaning import TaskCleaner, strip_bullet
+
+DEFAULT_CHUNK_SIZE = 50
+DEFAULT_REQUESTS_PER_SECOND = 1.0
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_RETRIES = 4
+
+# Errors that will not go away by retrying the same request
+NON_RETRYABLE_ERRORS = {"InvalidArgument", "PermissionDenied", "Unauthenticated", "NotFound"}
+
+def parse_tasks(text):
+    """Split a model response into task titles, stripping bullets and numbering."""
+    return [strip_bullet(line) for line in text.strip().split('\n') if line.strip()]
+
+def iter_task_lines(fragments):
+    """Yield cleaned tasks from streamed text fragments as soon as each line is complete."""
+    pending = ""
+    for fragment in fragments:
+        pending += fragment
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            if line.strip():
+                yield strip_bullet(line)
+    if pending.strip():
+        yield strip_bullet(pending)
+
+def stream_tasks(model, build_prompt, num_tasks, chunk_size=DEFAULT_CHUNK_SIZE, top_up_rounds=2):
+    """Yield unique tasks while streamed responses arrive.
+
+    Chunks are requested one after another with stream=True. The first
+    task is available as soon as the first line of the first response
+    arrives. When duplicates leave the result short, up to top_up_rounds
+    more rounds are requested for the missing tasks, like
+    generate_tasks_async().
+    """
+    cleaner = TaskCleaner()
+    produced = 0
+    for _ in range(top_up_rounds + 1):
+        for count in split_into_chunks(num_tasks - produced, chunk_size):
+            response = model.generate_content(build_prompt(count), stream=True)
+            fragments = (chunk.text for chunk in response)
+            for task in iter_task_lines(fragments):
+                if not cleaner.add(task):
+                    continue
+                yield task
+                produced += 1
+                if produced >= num_tasks:
+                    break
+            if produced >= num_tasks:
+                # Read the rest so wrappers such as the response cache see a complete response
+                for _ in fragments:
+                    pass
+                return
+        if produced >= num_tasks:
+            return
+
+def stream_tasks_to_csv(model, build_prompt, num_tasks, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Append streamed tasks to a CSV file as they arrive.
+
+    Every row is flushed immediately, so an interrupted run keeps what was
+    already produced. Returns the list of tasks written; on interruption
+    the exception propagates after the file is closed.
+    """
+    tasks = []
+    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+        writer = csv.writer(csvfile)
+        for task in stream_tasks(model, build_prompt, num_tasks, chunk_size):
+            writer.writerow([task])
+            csvfile.flush()
+            tasks.append(task)
+    return tasks
+
+def merge_unique(task_lists, limit=None):
+    """Merge task lists in order, dropping exact and near duplicates."""
+    cleaner = TaskCleaner()
+    merged = []
+    for tasks in task_lists:
+        for task in tasks:
+            if not cleaner.add(task):
+                continue
+            merged.append(task)
+            if limit is not None and len(merged) >= limit:
+                return merged
+    return merged
+
+def split_into_chunks(num_tasks, chunk_size):
+    """Return the task counts of each chunk, e.g. 120 by 50 -> [50, 50, 20]."""
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be at least 1")
+    full, rest = divmod(num_tasks, chunk_size)
+    return [chunk_size] * full + ([rest] if rest else [])
+
+class RateLimiter:
+    """Space out request starts to at most requests_per_second."""
+
+    def __init__(self, requests_per_second):
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0.0
+        self._next_start = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next_start - now
+            self._next_start = max(now, self._next_start) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+async def _call_model(model, prompt):
+    if hasattr(model, "generate_content_async"):
+        response = await model.generate_content_async(prompt)
+    else:
+        response = await asyncio.to_thread(model.generate_content, prompt)
+    return response.text
+
+async def request_with_retry(model, prompt, limiter, max_retries=DEFAULT_MAX_RETRIES, base_delay=1.0):
+    """Send one prompt, retrying transient failures with exponential backoff."""
+    for attempt in range(max_retries + 1):
+        await limiter.wait()
+        try:
+            return await _call_model(model, prompt)
+        except Exception as e:
+            if type(e).__name__ in NON_RETRYABLE_ERRORS or attempt == max_retries:
+                raise
+            # Full jitter keeps concurrent chunks from retrying in lockstep
+            await asyncio.sleep(random.uniform(0, base_delay * 2 ** attempt))
+
+async def generate_tasks_async(model, build_prompt, num_tasks, chunk_size=DEFAULT_CHUNK_SIZE,
+                               requests_per_second=DEFAULT_REQUESTS_PER_SECOND,
+                               max_concurrency=DEFAULT_MAX_CONCURRENCY,
+                               max_retries=DEFAULT_MAX_RETRIES, top_up_rounds=2):
+    """Generate num_tasks unique tasks with concurrent chunked requests.
+
+    build_prompt(count) returns the prompt asking for count tasks. When
+    duplicates leave the result short, up to top_up_rounds more rounds are
+    requested for the missing tasks. Chunks that still fail after retrying
+    are skipped; if every chunk fails the last error is raised.
+    """
+    if num_tasks <= 0:
+        return []
+    limiter = RateLimiter(requests_per_second)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_chunk(count):
+        async with semaphore:
+            text = await request_with_retry(model, build_prompt(count), limiter, max_retries)
+        return parse_tasks(text)[:count]
+
+    collected = []
+    missing = num_tasks
+    for _ in range(top_up_rounds + 1):
+        results = await asyncio.gather(
+            *(run_chunk(count) for count in split_into_chunks(missing, chunk_size)),
+            return_exceptions=True)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if len(errors) == len(results) and not collected:
+            raise errors[-1]
+        collected.append(merge_unique(result for result in results if not isinstance(result, BaseException)))
+        tasks = merge_unique(collected, num_tasks)
+        missing = num_tasks - len(tasks)
+        if missing <= 0:
+            break
+    return merge_unique(collected, num_tasks)
+
+def generate_tasks_concurrently(model, build_prompt, num_tasks, **options):
+    """Synchronous wrapper around generate_tasks_async()."""
+    return asyncio.run(generate_tasks_async(model, build_prompt, num_tasks, **options))
@@ -1,34 +1,45 @@
 import datetime
 import random
-import csv
+import math
 import os
+import sys
+import json
+import argparse
+import ics_writer
+import profiling
+from intervals import IntervalIndex
+from title_pool import TitlePool, title_sampler
 
 def generate_ics_event(start_time, end_time, summary):
   """Generates an ics event string."""
-  event_string = f"""
-BEGIN:VEVENT
-UID:{start_time.strftime('%Y%m%dT%H%M%S')}
-DTSTAMP:{datetime.datetime.now().strftime('%Y%m%dT%H%M%SZ')}
-DTSTART:{start_time.strftime('%Y%m%dT%H%M%S')}
-DTEND:{end_time.strftime('%Y%m%dT%H%M%S')}
-SUMMARY:{summary}
-END:VEVENT
-"""
-  return event_string
-
-def get_event_titles_from_csv(csv_path):
-  """Import event titles from a CSV file."""
-  titles = []
-  try:
-    with open(csv_path, 'r') as csvfile:
-      reader = csv.reader(csvfile)
-      for row in reader:
-        if row:  # Skip empty rows
-          titles.append(row[0])  # Assuming titles are in the first column
-    return titles
-  except Exception as e:
-    print(f"Error reading CSV: {e}")
-    return []
+  return ics_writer.format_event(start_time, end_time, summary)
+
+class Event:
+  """A generated event kept as minutes since midnight plus a title index.
+
+  The VEVENT text is only rendered when ics_writer writes the day out.
+  """
+  __slots__ = ('start', 'end', 'title')
+
+  def __init__(self, start, end, title):
+    self.start = start
+    self.end = end
+    self.title = title
+
+  @property
+  def hour(self):
+    return self.start // 60
+
+  @property
+  def minute(self):
+    return self.start % 60
+
+  @property
+  def duration(self):
+    return self.end - self.start
+
+  def __repr__(self):
+    return f"Event({self.hour:02d}:{self.minute:02d}, {self.duration} min, title={self.title})"
 
 def ask_yes_no_question(question, default="y"):
     """Ask a yes/no question with default 'y' when pressing enter."""
@@ -42,6 +53,619 @@ def find_csv_files():
     csv_files = [f for f in os.listdir() if f.endswith('.csv')]
     return csv_files
 
+# Scaling factors for the multi-day distribution patterns
+# Progressive reduction pattern (keyed by day offset)
+progressive_scaling_factors = {
+  0: 1.0,  # First day - 100% events
+  1: 1.0,  # Second day - 100% events
+  2: 0.7,  # Third day - 70% events
+  3: 0.5,  # Fourth day - 50% events
+  4: 0.2,  # Fifth day (Friday) - 20% events
+}
+
+# Workweek pattern (keyed by day offset modulo 5)
+weekday_scaling_factors = {
+  0: 0.8,  # Monday - 80% events
+  1: 1.0,  # Tuesday - 100% events
+  2: 0.9,  # Wednesday - 90% events
+  3: 1.0,  # Thursday - 100% events
+  4: 0.6,  # Friday - 60% events
+}
+
+PATTERNS = ("even", "progressive", "workweek")
+ENGINES = ("python", "vectorized", "templates")
+
+# Bump whenever a change alters the days generated for a given seed, so that
+# cached days from older versions are no longer reused.
+# 2: density reduction applies to every day below 100%, including workweek days
+# 3: gap filler events draw their titles like the other events
+GENERATOR_VERSION = 3
+
+def get_scaling_factor(pattern, day_offset):
+  """Return the event density for a day offset under the given pattern."""
+  if pattern == "progressive" and day_offset > 1:
+    return progressive_scaling_factors.get(day_offset, 0.2)  # Default to 20% for days beyond mapping
+  if pattern == "workweek":
+    return weekday_scaling_factors.get(day_offset % 5, 1.0)  # Use modulo to repeat pattern for weeks
+  return 1.0
+
+# Workday boundaries in minutes since midnight
+# End of workday: 18:00 ± 1 hour in 15-min increments
+WORKDAY_END_CHOICES = [17 * 60 + m for m in range(0, 60, 15)] + [18 * 60 + m for m in range(0, 60, 15)] + [19 * 60]
+# First event of the day: 7:45 to 9:00 in 15-min increments
+FIRST_START_CHOICES = [7 * 60 + 45] + [8 * 60 + m for m in range(0, 60, 15)] + [9 * 60]
+# Every first-pass start is at least 15 minutes after the previous one, which
+# bounds the number of first-pass events that fit into the longest workday
+MAX_FIRST_PASS_EVENTS = (WORKDAY_END_CHOICES[-1] - FIRST_START_CHOICES[0]) // 15 + 1
+
+def first_pass_stop_probability(scaling_factor):
+  """Chance that a reduced-density day stops adding first-pass events.
+
+  Once a day has 3 events, each attempt skips with probability
+  (1 - f) * f, stops with probability (1 - f) ** 2 and places an event
+  with probability f. Skips change nothing, so only the stop/place split
+  matters.
+  """
+  miss = (1.0 - scaling_factor) ** 2
+  return miss / (miss + scaling_factor)
+
+def sample_first_pass_limit(scaling_factor, rng):
+  """Decide up front how many first-pass events a day may get.
+
+  Days at full density are only limited by the end of the workday. Reduced
+  days get 3 events plus a geometric number of extras, drawn in one step
+  instead of spinning on skipped iterations.
+  """
+  if scaling_factor >= 1.0:
+    return MAX_FIRST_PASS_EVENTS
+  stop_probability = first_pass_stop_probability(scaling_factor)
+  if stop_probability >= 1.0:
+    return 3
+  extra = int(math.log(1.0 - rng.random()) / math.log(1.0 - stop_probability))
+  return min(3 + extra, MAX_FIRST_PASS_EVENTS)
+
+# Set by generate_schedule() while a profiled run is in progress
+profiler = None
+
+def generate_day_events(current_date, titles, rng, scaling_factor=1.0):
+  """Generate the events for a single day.
+
+  Days with a scaling_factor below 1.0 get fewer and shorter events; the
+  first pass does at most MAX_FIRST_PASS_EVENTS iterations. All scheduling
+  is done in integer minutes since midnight; datetimes are only created
+  when the day is rendered. Returns a tuple of
+  (events, (end_hour, end_minute)) where events is a list of Event objects
+  whose title indexes into titles (a TitlePool or a list).
+  """
+  # Generate random end of workday
+  end_of_workday = rng.choice(WORKDAY_END_CHOICES)
+  pick_title = title_sampler(titles, rng)
+  prof = profiler
+  if prof is not None:
+    pick_title = prof.timed("title_sampling", pick_title)
+    phase_start = prof.clock()
+  
+  # Generate events
+  events = []
+  busy = IntervalIndex()  # Union of all events, maintained as events are added
+  long_events = []  # Track events 2+ hours long for overlapping
+  event_count = 0
+  previous_end = None
+  previous_start = None
+  
+  # Target event count with scaling if enabled
+  reduce_density = scaling_factor < 1.0
+  base_target = rng.randint(9, 15)
+  if reduce_density:
+      target_event_count = max(3, int(base_target * scaling_factor))  # Ensure at least 3 events
+  else:
+      target_event_count = base_target
+  first_pass_limit = sample_first_pass_limit(scaling_factor, rng)
+      
+  # First pass: create main events
+  for _ in range(first_pass_limit):
+    if event_count == 0:
+      # For the first event, randomize start time
+      start = rng.choice(FIRST_START_CHOICES)
+    else:
+      # Increase overlap probability to 40% to create more events
+      should_overlap = rng.random() < 0.4 and previous_start is not None
+      
+      if should_overlap:
+        # For overlapping events, start sometime between previous start and end
+        # Ensure at least 15 minutes after previous start
+        min_start = previous_start + 15
+        max_start = previous_end - 15
+        
+        # If there's not enough time to overlap properly, default to non-overlapping
+        if min_start >= max_start:
+          should_overlap = False
+      
+      if should_overlap:
+        # Calculate random start time within the available window
+        start = min_start + rng.randrange(0, max_start - min_start, 15)
+      else:
+        # For non-overlapping events, start after the previous event ends with a shorter break (5-15 min)
+        start = previous_end + rng.choice([5, 10, 15])
+      
+      # If the start time is already past the end of workday, we're done
+      if start >= end_of_workday:
+        break
+
+    # Generate random duration - bias toward shorter events
+    # 70% chance of 30-90 minutes, 30% chance of 90-240 minutes
+    if reduce_density and rng.random() > scaling_factor:
+        duration_minutes = rng.randrange(30, 61, 15)  # Only short events for later days
+    else:
+        # Regular duration logic
+        if rng.random() < 0.7:
+            duration_minutes = rng.randrange(30, 91, 15)  # 30-90 minutes
+        else:
+            duration_minutes = rng.randrange(90, 241, 15)  # 90-240 minutes
+    
+    # If end time is past end of workday, truncate it
+    end = min(start + duration_minutes, end_of_workday)
+    duration_minutes = end - start
+    
+    # Store the times for the next iteration
+    previous_end = end
+    previous_start = start
+
+    # Pick a random title from the CSV (stored as an index into titles)
+    events.append(Event(start, end, pick_title()))
+    busy.add(start, end)
+    event_count += 1
+    
+    # Track longer events (90+ minutes) for adding overlapping short events
+    if duration_minutes >= 90:
+      long_events.append((start, end, event_count))
+
+  if prof is not None:
+    # Every first-pass iteration places an event, except a final one that
+    # ran past the end of the workday
+    first_pass_events = event_count
+    prof.count("first_pass_limit", first_pass_limit)
+    prof.count("first_pass_iterations", first_pass_events + (first_pass_events < first_pass_limit))
+    phase_end = prof.clock()
+    prof.add("first_pass", phase_end - phase_start)
+    phase_start = phase_end
+
+  # Second pass: add multiple overlapping events for longer events
+  for long_start, long_end, long_event_num in long_events:
+    # Calculate duration of the long event
+    long_duration = long_end - long_start
+    
+    # Target coverage: ~75% of the long event (randomized between 65-85%)
+    coverage_percent = rng.uniform(0.65, 0.85)
+    target_overlap_minutes = int(long_duration * coverage_percent)
+    
+    # Calculate how many short events needed (15-45 min each)
+    avg_short_duration = 30  # average short event duration
+    num_short_events = max(1, target_overlap_minutes // avg_short_duration)
+    
+    # Add short events until we reach the target coverage
+    overlap_covered = 0
+    attempts = 0
+    
+    # Ensure short events start before the long event ends
+    max_start = long_end - 15
+    
+    while overlap_covered < target_overlap_minutes and attempts < num_short_events * 2 and event_count < target_event_count + 5:
+      # Calculate a valid window for the short event to start
+      # Ensure it starts after the long event starts
+      min_start = long_start + overlap_covered
+      
+      if min_start >= max_start:
+        break
+      
+      # Calculate random start time within the available window
+      short_start = min_start + rng.randrange(0, max_start - min_start, 15)
+      
+      # Generate short event duration (15-45 minutes in 15-minute increments)
+      # and ensure the short event ends before the long event ends
+      short_end = min(short_start + rng.choice([15, 30, 45]), long_end)
+      
+      events.append(Event(short_start, short_end, pick_title()))  # Randomly choose title here too
+      busy.add(short_start, short_end)
+      event_count += 1
+      
+      # Update coverage tracking
+      overlap_covered += short_end - short_start
+      attempts += 1
+  
+  if prof is not None:
+    # Each overlap iteration places one short event
+    overlap_events = event_count - first_pass_events
+    prof.count("overlap_iterations", overlap_events)
+    phase_end = prof.clock()
+    prof.add("long_event_overlaps", phase_end - phase_start)
+    phase_start = phase_end
+  
+  # Add extra events if we're below the minimum target (9)
+  while event_count < 9:
+    # Choose a random free gap of at least 30 minutes between events
+    gap = busy.choose_gap(30, rng)
+    if gap is None:
+      break
+    gap_start, gap_end = gap
+    
+    # Create an event in this gap
+    duration_minutes = min(rng.choice([15, 30, 45]), gap_end - gap_start - 5)
+    start = gap_start + 5
+    
+    events.append(Event(start, start + duration_minutes, pick_title()))
+    busy.add(start, start + duration_minutes)
+    event_count += 1
+
+  if prof is not None:
+    gap_events = event_count - first_pass_events - overlap_events
+    prof.count("gap_filler_iterations", gap_events + (event_count < 9))  # plus one that found no gap
+    prof.add("gap_filler", prof.clock() - phase_start)
+
+  return events, divmod(end_of_workday, 60)
+
+def fit_events(events, blocked, end_of_workday):
+  """Move a day's events out of imported busy time.
+
+  blocked is the day's IntervalIndex from ics_import.BusyIndex. Events that
+  are clear of it stay where they are, overlaps between them included.
+  Every other event moves to the next slot after its start that is free
+  of both the imported blocks and the events placed so far and ends by
+  end_of_workday (minutes since midnight), or else the first such slot of
+  the day. Events that fit nowhere are dropped. Returns the new list of
+  events in their original order.
+  """
+  taken = blocked.copy()  # Imported blocks plus the events placed so far
+  fitted = [None] * len(events)
+  displaced = []
+  for position, event in enumerate(events):
+    if blocked.is_free(event.start, event.end):
+      fitted[position] = event
+      taken.add(event.start, event.end)
+    else:
+      displaced.append(position)
+  if displaced:
+    day_start = min(event.start for event in events)
+    for position in displaced:
+      event = events[position]
+      duration = event.end - event.start
+      start = taken.next_free(event.start, duration, end_of_workday)
+      if start is None:
+        start = taken.next_free(day_start, duration, end_of_workday)
+      if start is not None:
+        fitted[position] = Event(start, start + duration, event.title)
+        taken.add(start, start + duration)
+  return [event for event in fitted if event is not None]
+
+def build_filename(start_date, days_to_generate, user=None):
+  """Build the default ics filename for a date range."""
+  if days_to_generate == 1:
+    filename = f"events_{start_date.strftime('%Y%m%d')}.ics"
+  else:
+    end_date = start_date + datetime.timedelta(days=days_to_generate-1)
+    filename = f"events_{start_date.strftime('%Y%m%d')}_to_{end_date.strftime('%Y%m%d')}.ics"
+  if user:
+    filename = f"{user}_{filename}"
+  return filename
+
+def parse_date(value):
+  """Parse a YYYY-MM-DD string (or pass through a date) into a date."""
+  if isinstance(value, datetime.date):
+    return value
+  return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+def load_titles(config, titles_cache=None):
+  """Resolve the TitlePool for a config, reusing already indexed CSVs."""
+  no_repeat = int(config.get('no_repeat') or 0)
+  titles = config.get('titles')
+  if isinstance(titles, TitlePool):
+    return titles
+  if titles:
+    return TitlePool.from_titles(titles, no_repeat)
+  titles_file = config.get('titles_file')
+  if not titles_file:
+    raise ValueError("Config needs either 'titles' or 'titles_file'")
+  cache_key = (titles_file, no_repeat)
+  if titles_cache is not None and cache_key in titles_cache:
+    return titles_cache[cache_key]
+  titles = TitlePool.from_csv(titles_file, no_repeat)
+  if not titles:
+    raise ValueError(f"No titles found in '{titles_file}'")
+  if titles_cache is not None:
+    titles_cache[cache_key] = titles
+  return titles
+
+def day_rng(seed, current_date):
+  """Return the random stream for one day of a seeded schedule.
+
+  The stream only depends on the seed and the date, so any day can be
+  regenerated on its own, in any order or on any worker. Seeding with a
+  string hashes it with SHA-512, which is stable across processes.
+  """
+  return random.Random(f"{seed}/{current_date.isoformat()}")
+
+def generate_day(current_date, titles, seed, scaling_factor=1.0):
+  """Generate one day of a seeded schedule independently of its neighbours."""
+  return generate_day_events(current_date, titles, day_rng(seed, current_date), scaling_factor)
+
+def iter_schedule_days(start_date, days_to_generate, pattern, titles, seed=None, verbose=False,
+                       engine="python", cache=None, busy=None, templates=None):
+  """Yield (current_date, events, (end_hour, end_minute)) one day at a time.
+
+  With a seed every day draws from its own day_rng() stream; without one
+  all days share a single unseeded generator. A day_cache.DayCache is only
+  used for seeded runs of the Python engine, where a day is fully defined
+  by its cache key. The templates engine draws each day from a
+  day_templates.TemplateLibrary (templates, or the default library when
+  None). With an ics_import.BusyIndex, every day is fitted
+  around the imported busy time after it is generated or read from the
+  cache, so cached days stay valid when the imported calendars change.
+  """
+  if seed is None or engine != "python":
+    cache = None
+  if cache is not None and not isinstance(titles, TitlePool):
+    titles = TitlePool.from_titles(titles)
+  titles_key = titles.cache_key if cache is not None else None
+  shared_rng = random.Random() if seed is None else None
+  vectorized_days = None
+  if engine == "vectorized":
+    # NumPy is optional, so the bulk engine is only imported when asked for
+    import vectorized
+    vectorized_days = vectorized.iter_schedule_day_events(days_to_generate, pattern, len(titles), seed)
+  elif engine == "templates" and templates is None:
+    import day_templates  # Only template runs need the library
+    templates = day_templates.load_library()
+
+  for day_offset in range(days_to_generate):
+    # Calculate the current date
+    current_date = start_date + datetime.timedelta(days=day_offset)
+    
+    # Get scaling factor for this day
+    scaling_factor = get_scaling_factor(pattern, day_offset)
+    
+    if verbose:
+      print(f"\nGenerating events for {current_date.strftime('%Y-%m-%d')}:")
+      if pattern == "progressive" and day_offset > 1:
+          print(f"Event density: {int(scaling_factor * 100)}% (progressive reduction enabled)")
+      elif pattern == "workweek":
+          weekday_name = current_date.strftime('%A')
+          print(f"Event density: {int(scaling_factor * 100)}% ({weekday_name} - workweek pattern)")
+    
+    prof = profiler
+    if vectorized_days is not None:
+      if prof is not None:
+        phase_start = prof.clock()
+      events, end_of_workday = next(vectorized_days)
+      if prof is not None:
+        prof.add("vectorized_generation", prof.clock() - phase_start)
+    elif engine == "templates":
+      if prof is not None:
+        phase_start = prof.clock()
+      rng = shared_rng or day_rng(seed, current_date)
+      events, end_of_workday = templates.generate_day(titles, rng, scaling_factor, Event)
+      if prof is not None:
+        prof.add("template_lookup", prof.clock() - phase_start)
+    else:
+      cache_key = None
+      cached = None
+      if cache is not None:
+        if prof is not None:
+          phase_start = prof.clock()
+        cache_key = cache.key(current_date, seed, scaling_factor, titles_key, GENERATOR_VERSION)
+        cached = cache.get(cache_key, Event)
+        if prof is not None:
+          prof.add("cache_lookup", prof.clock() - phase_start)
+          prof.count("cache_hits" if cached is not None else "cache_misses")
+      if cached is not None:
+        events, end_of_workday = cached
+      else:
+        rng = shared_rng or day_rng(seed, current_date)
+        events, end_of_workday = generate_day_events(current_date, titles, rng, scaling_factor)
+        if cache_key is not None:
+          if prof is not None:
+            phase_start = prof.clock()
+          cache.put(cache_key, events, end_of_workday)
+          if prof is not None:
+            prof.add("cache_store", prof.clock() - phase_start)
+    blocked = busy.get(current_date) if busy is not None else None
+    if blocked is not None:
+      if prof is not None:
+        phase_start = prof.clock()
+        generated = len(events)
+      end_hour, end_minute = end_of_workday
+      events = fit_events(events, blocked, end_hour * 60 + end_minute)
+      if prof is not None:
+        prof.add("busy_fit", prof.clock() - phase_start)
+        prof.count("busy_dropped", generated - len(events))
+    yield current_date, events, end_of_workday
+
+def summarize_day(current_date, events, end_of_workday, details=False):
+  """Reduce a generated day to the small summary dict used for reporting."""
+  end_hour, end_minute = end_of_workday
+  day_info = {
+    'date': current_date.strftime('%Y-%m-%d'),
+    'event_count': len(events),
+    'end_time': f"{end_hour:02d}:{end_minute:02d}"
+  }
+  if details:
+    day_info['events'] = [(event.hour, event.minute, event.duration) for event in events]
+  return day_info
+
+def write_ics_stream(writer, days, titles, details=False):
+  """Write each day's VEVENTs as soon as it is generated.
+
+  writer is an ics_writer.IcsWriter. Only the per-day summaries are kept,
+  so memory stays flat regardless of the length of the date range.
+  Returns the list of summaries.
+  """
+  day_summaries = []
+  writer.begin()
+  prof = profiler
+  for current_date, events, end_of_workday in days:
+    if prof is None:
+      writer.write_day(current_date, events, titles)
+    else:
+      phase_start = prof.clock()
+      chunks = writer.format_day(current_date, events, titles)
+      phase_end = prof.clock()
+      writer.write_chunks(chunks, len(events))
+      prof.add("serialization", phase_end - phase_start)
+      prof.add("file_write", prof.clock() - phase_end)
+      prof.end_day(current_date, len(events))
+    day_summaries.append(summarize_day(current_date, events, end_of_workday, details))
+  writer.end()
+  if prof is not None:
+    phase_start = prof.clock()
+    writer.f.flush()
+    prof.add("file_write", prof.clock() - phase_start)
+  return day_summaries
+
+def generate_schedule(config, titles_cache=None):
+  """Generate an ics file from a config dict without any prompts.
+
+  Supported keys:
+    start_date   date or 'YYYY-MM-DD' (default: today)
+    days         number of days to generate (default: 1)
+    pattern      'even', 'progressive' or 'workweek' (default: 'even')
+    titles       list of event titles (or a TitlePool), or
+    titles_file  CSV file with titles in the first column and optional
+                 weights in the second
+    no_repeat    number of previous draws a title may not repeat
+                 within a day (default: 0)
+    seed         seed for the random generator; each day gets its own
+                 stream derived from (seed, date) (default: unseeded)
+    output       output filename (default: events_<dates>.ics)
+    user         optional prefix for the default filename, also added
+                 to every UID
+    dtstamp      DTSTAMP for every event as a datetime or
+                 'YYYYMMDDTHHMMSSZ' (default: now)
+    verbose      print per-day progress (default: False)
+    engine       'python', 'vectorized' (NumPy bulk generator) or
+                 'templates' (precomputed day layouts, see
+                 day_templates.py; default: 'python')
+    template_library  file of the template library, built on first use
+                 (default: .day-templates)
+    template_pool     templates per density level (default: 1000)
+    cache_dir    directory for the per-day cache of seeded runs
+                 (default: no cache)
+    cache_max_mb size limit of the cache before old days are evicted
+                 (default: 64)
+    details      keep (hour, minute, duration) per event in the day
+                 summaries (default: False)
+    profile      'table' or 'jsonl' to record per-phase timings and
+                 counters (see profiling.py; default: off)
+    profile_memory   also record tracemalloc peaks (default: False)
+    profile_output   file to append the profile to (default: stderr)
+    busy_ics     list of .ics files or directories of them whose events
+                 count as busy; generated events are only placed in
+                 the free time around them (see ics_import.py)
+    delta_state  JSON state file of the previous run; when set, only
+                 added, modified and cancelled events are written (see
+                 ics_delta.py). Use with a seed so unchanged days match.
+
+  Days are written to the file as they are generated. Returns a dict with
+  the filename, total event count and per-day summaries, plus the profile
+  summary under 'profile' when profiling.
+  """
+  global profiler
+  if not config.get('profile'):
+    return _generate_schedule(config, titles_cache)
+  prof = profiling.Profiler(config['profile'], config.get('profile_memory', False),
+                            config.get('profile_output'))
+  profiler = prof
+  prof.start()
+  try:
+    result = _generate_schedule(config, titles_cache)
+  finally:
+    prof.stop()
+    profiler = None
+  prof.report()
+  result['profile'] = prof.summary()
+  return result
+
+def _generate_schedule(config, titles_cache=None):
+  start_date = parse_date(config.get('start_date') or datetime.date.today())
+  days_to_generate = int(config.get('days', 1))
+  if days_to_generate < 1:
+    raise ValueError(f"days must be at least 1, got {days_to_generate}")
+  pattern = config.get('pattern', 'even')
+  if pattern not in PATTERNS:
+    raise ValueError(f"Unknown pattern '{pattern}', expected one of {', '.join(PATTERNS)}")
+  engine = config.get('engine', 'python')
+  if engine not in ENGINES:
+    raise ValueError(f"Unknown engine '{engine}', expected one of {', '.join(ENGINES)}")
+  titles = load_titles(config, titles_cache)
+
+  filename = config.get('output') or build_filename(start_date, days_to_generate, config.get('user'))
+  cache = None
+  if config.get('cache_dir'):
+    import day_cache  # Only runs with a cache need it
+    cache = day_cache.DayCache(config['cache_dir'], int(config.get('cache_max_mb', 64) * 1024 * 1024))
+  templates = None
+  if engine == "templates":
+    import day_templates  # Only template runs need the library
+    templates = day_templates.load_library(config.get('template_library') or day_templates.DEFAULT_LIBRARY_PATH,
+                                           int(config.get('template_pool') or day_templates.DEFAULT_POOL_SIZE))
+  busy = None
+  busy_ics = config.get('busy_ics')
+  if busy_ics:
+    import ics_import  # Only runs that schedule around existing calendars need it
+    busy = ics_import.load_busy_index([busy_ics] if isinstance(busy_ics, str) else busy_ics)
+  days = iter_schedule_days(start_date, days_to_generate, pattern, titles, config.get('seed'),
+                            config.get('verbose', False), engine, cache, busy, templates)
+  
+  delta_state = config.get('delta_state')
+  # Stream the events into the ics file day by day
+  with open(filename, "wb") as f:
+    if delta_state:
+      import ics_delta
+      writer = ics_delta.DeltaWriter(f, ics_delta.load_state(delta_state), config.get('dtstamp'), config.get('user'))
+    else:
+      writer = ics_writer.IcsWriter(f, config.get('dtstamp'), config.get('user'))
+    day_summaries = write_ics_stream(writer, days, titles, config.get('details', False))
+  if delta_state:
+    ics_delta.save_state(delta_state, writer.state)
+
+  result = {
+    'filename': filename,
+    'total_events': sum(day_info['event_count'] for day_info in day_summaries),
+    'day_summaries': day_summaries,
+  }
+  if cache is not None:
+    result['cache_hits'] = cache.hits
+    result['cache_misses'] = cache.misses
+  if delta_state:
+    result['delta'] = {
+      'added': writer.added,
+      'modified': writer.modified,
+      'cancelled': writer.cancelled,
+      'unchanged': writer.unchanged,
+    }
+  return result
+
+def print_summary(result):
+  """Print the generated file name and the per-day summary."""
+  print(f"\nEvents generated successfully! Saved as {result['filename']}")
+  print(f"Total events generated: {result['total_events']}")
+  
+  # Print summary for each day
+  print("\nSummary by day:")
+  for day_info in result['day_summaries']:
+    print(f"Date: {day_info['date']}, Events: {day_info['event_count']}, Workday ending at: {day_info['end_time']}")
+
+def print_event_details(day_summaries):
+  """Print start time and duration of every event, grouped by day."""
+  for day_info in day_summaries:
+    print(f"\nEvents for {day_info['date']}:")
+    for i, (hour, minute, duration_minutes) in enumerate(day_info.get('events', [])):
+      hours = duration_minutes // 60
+      minutes = duration_minutes % 60
+      duration_display = f"{hours} hours, {minutes} minutes" if hours > 0 else f"{minutes} minutes"
+      
+      print(f"Event {i+1}:")
+      print(f"  Start time: {hour:02d}:{minute:02d}")
+      print(f"  Duration: {duration_display}")
+
 def main():
   """Generates an ics file with events filling a workday."""
 
@@ -61,10 +685,7 @@ def main():
   multi_day = ask_yes_no_question("Do you want to add events for multiple days?")
   
   days_to_generate = 1  # Default to 1 day (just the specified date)
-  
-  # Initialize pattern variables
-  progressive_reduction = False
-  week_pattern = False
+  pattern = "even"
   
   if multi_day:
     # Ask how many additional days
@@ -84,10 +705,10 @@ def main():
         pattern_choice = input("Enter choice [1]: ").strip()
         
         if pattern_choice == "2":
-          progressive_reduction = True
+          pattern = "progressive"
           print("Using progressive reduction pattern (70%/50%/20% after day 2)")
         elif pattern_choice == "3" and days_to_generate >= 5:
-          week_pattern = True
+          pattern = "workweek"
           print("Using workweek pattern (M:80%, Tu:100%, W:90%, Th:100%, F:60%)")
         else:
           print("Using even distribution")
@@ -95,25 +716,6 @@ def main():
       print("Invalid input. Defaulting to 1 day.")
       days_to_generate = 1
 
-  # Define scaling factors for different days
-  # Progressive reduction pattern
-  progressive_scaling_factors = {
-    0: 1.0,  # First day - 100% events
-    1: 1.0,  # Second day - 100% events
-    2: 0.7,  # Third day - 70% events
-    3: 0.5,  # Fourth day - 50% events
-    4: 0.2,  # Fifth day (Friday) - 20% events
-  }
-  
-  # Workweek pattern
-  weekday_scaling_factors = {
-    0: 0.8,  # Monday - 80% events
-    1: 1.0,  # Tuesday - 100% events
-    2: 0.9,  # Wednesday - 90% events
-    3: 1.0,  # Thursday - 100% events
-    4: 0.6,  # Friday - 60% events
-  }
-  
   # Look for CSV files in the current directory
   csv_files = find_csv_files()
   selected_csv = None
@@ -139,7 +741,11 @@ def main():
     if selected_csv:
       csv_path = selected_csv
       print(f"Using '{csv_path}'")
-      titles = get_event_titles_from_csv(csv_path)
+      try:
+        titles = TitlePool.from_csv(csv_path)
+      except Exception as e:
+        print(f"Error reading CSV: {e}")
+        titles = None
       if not titles:
         summary = input("No titles found or error reading CSV. Enter event title: ")
         titles = [summary]
@@ -153,270 +759,151 @@ def main():
     print("No CSV files found in the current directory.")
     summary = input("Enter event title: ")
     titles = [summary]
+
+  # Optionally keep the generated events clear of an existing calendar
+  busy_ics = None
+  if ask_yes_no_question("Schedule around existing calendar (.ics) files?", "n"):
+    paths_input = input("Enter .ics files or folders, separated by commas [_example-ics-files]: ")
+    busy_ics = [path.strip() for path in paths_input.split(",") if path.strip()] or ["_example-ics-files"]
   
-  # Initialize lists to store all events and summary info
-  all_events = []
-  day_summaries = []
-  
-  # Generate events for each day
-  for day_offset in range(days_to_generate):
-    # Calculate the current date
-    current_date = datetime.date(year, month, day) + datetime.timedelta(days=day_offset)
-    
-    # Get scaling factor for this day
-    scaling_factor = 1.0
-    if progressive_reduction and day_offset > 1:
-        scaling_factor = progressive_scaling_factors.get(day_offset, 0.2)  # Default to 20% for days beyond mapping
-    elif week_pattern:
-        scaling_factor = weekday_scaling_factors.get(day_offset % 5, 1.0)  # Use modulo to repeat pattern for weeks
-    
-    print(f"\nGenerating events for {current_date.strftime('%Y-%m-%d')}:")
-    if progressive_reduction and day_offset > 1:
-        print(f"Event density: {int(scaling_factor * 100)}% (progressive reduction enabled)")
-    elif week_pattern:
-        weekday_name = current_date.strftime('%A')
-        print(f"Event density: {int(scaling_factor * 100)}% ({weekday_name} - workweek pattern)")
-    
-    # Generate random end of workday (18:00 ± 1 hour in 15-min increments)
-    possible_end_times = [
-      (17, 0), (17, 15), (17, 30), (17, 45),
-      (18, 0), (18, 15), (18, 30), (18, 45),
-      (19, 0)
-    ]
-    end_hour, end_minute = random.choice(possible_end_times)
-    end_of_workday = datetime.datetime.combine(current_date, datetime.time(end_hour, end_minute))
-    
-    # Generate events
-    events = []
-    long_events = []  # Track events 2+ hours long for overlapping
-    event_count = 0
-    previous_end_time = None
-    previous_start_time = None
-    
-    # Target event count with scaling if enabled
-    base_target = random.randint(9, 15)
-    if progressive_reduction and day_offset > 1:
-        target_event_count = max(3, int(base_target * scaling_factor))  # Ensure at least 3 events
-    else:
-        target_event_count = base_target
-        
-    # First pass: create main events
-    while True:
-      # For progressive reduction, we'll also modify the chance of adding a new event
-      if progressive_reduction and day_offset > 1:
-          # Skip this iteration with probability (1-scaling_factor) after we have at least 3 events
-          if event_count >= 3 and random.random() > scaling_factor:
-              # Either break the loop or continue with reduced probability
-              if random.random() > scaling_factor:
-                  break
-              continue
-
-      if event_count == 0:
-        # For the first event, randomize start time
-        possible_times = [(7, 45), (8, 0), (8, 15), (8, 30), (8, 45), (9, 0)]
-        hour, minute = random.choice(possible_times)
-        start_time = datetime.datetime.combine(current_date, datetime.time(hour, minute))
-      else:
-        # Increase overlap probability to 40% to create more events
-        should_overlap = random.random() < 0.4 and previous_start_time is not None
-        
-        if should_overlap:
-          # For overlapping events, start sometime between previous start and end
-          # Ensure at least 15 minutes after previous start
-          min_start = previous_start_time + datetime.timedelta(minutes=15)
-          max_start = previous_end_time - datetime.timedelta(minutes=15)
-          
-          # If there's not enough time to overlap properly, default to non-overlapping
-          if min_start >= max_start:
-            should_overlap = False
-        
-        if should_overlap and min_start < max_start:
-          # Calculate random start time within the available window
-          overlap_minutes = random.randrange(0, int((max_start - min_start).total_seconds() / 60), 15)
-          start_time = min_start + datetime.timedelta(minutes=overlap_minutes)
-        else:
-          # For non-overlapping events, start after the previous event ends with a shorter break (5-15 min)
-          break_time = random.choice([5, 10, 15])
-          start_time = previous_end_time + datetime.timedelta(minutes=break_time)
-        
-        # If the start time is already past the end of workday, we're done
-        if start_time >= end_of_workday:
-          break
-          
-        hour = start_time.hour
-        minute = start_time.minute
-
-      # Generate random duration - bias toward shorter events
-      # 70% chance of 30-90 minutes, 30% chance of 90-240 minutes
-      if progressive_reduction and day_offset > 1 and random.random() > scaling_factor:
-          duration_minutes = random.randrange(30, 61, 15)  # Only short events for later days
-      else:
-          # Regular duration logic
-          if random.random() < 0.7:
-              duration_minutes = random.randrange(30, 91, 15)  # 30-90 minutes
-          else:
-              duration_minutes = random.randrange(90, 241, 15)  # 90-240 minutes
-      
-      # Create datetime object for the end time
-      end_time = start_time + datetime.timedelta(minutes=duration_minutes)
-      
-      # If end time is past end of workday, truncate it
-      if end_time > end_of_workday:
-        end_time = end_of_workday
-        duration_minutes = int((end_time - start_time).total_seconds() / 60)
-      
-      # Store the times for the next iteration
-      previous_end_time = end_time
-      previous_start_time = start_time
-
-      # Generate the ics event string using randomly selected title from CSV
-      event_title = random.choice(titles)
-      ics_event = generate_ics_event(start_time, end_time, event_title)
-      events.append((ics_event, hour, minute, duration_minutes, start_time, end_time))
-      event_count += 1
-      
-      # Track longer events (90+ minutes) for adding overlapping short events
-      if duration_minutes >= 90:
-        long_events.append((start_time, end_time, event_count))
-
-    # Second pass: add multiple overlapping events for longer events
-    for long_start, long_end, long_event_num in long_events:
-      # Calculate duration of the long event
-      long_duration = int((long_end - long_start).total_seconds() / 60)
-      
-      # Target coverage: ~75% of the long event (randomized between 65-85%)
-      coverage_percent = random.uniform(0.65, 0.85)
-      target_overlap_minutes = int(long_duration * coverage_percent)
-      
-      # Calculate how many short events needed (15-45 min each)
-      avg_short_duration = 30  # average short event duration
-      num_short_events = max(1, target_overlap_minutes // avg_short_duration)
-      
-      # Add short events until we reach the target coverage
-      overlap_covered = 0
-      attempts = 0
-      
-      while overlap_covered < target_overlap_minutes and attempts < num_short_events * 2 and event_count < target_event_count + 5:
-        # Calculate a valid window for the short event to start
-        # Ensure it starts after the long event starts
-        min_start = long_start + datetime.timedelta(minutes=overlap_covered)
-        
-        # Ensure it ends before the long event ends
-        max_start = long_end - datetime.timedelta(minutes=15)
-        
-        if min_start >= max_start:
-          break
-        
-        # Calculate random start time within the available window
-        overlap_minutes = random.randrange(0, int((max_start - min_start).total_seconds() / 60), 15)
-        short_start = min_start + datetime.timedelta(minutes=overlap_minutes)
-        
-        # Generate short event duration (15-45 minutes in 15-minute increments)
-        short_duration = random.choice([15, 30, 45])
-        
-        # Create datetime object for the end time
-        short_end = short_start + datetime.timedelta(minutes=short_duration)
-        
-        # Ensure the short event ends before the long event ends
-        if short_end > long_end:
-          short_end = long_end
-          short_duration = int((short_end - short_start).total_seconds() / 60)
-        
-        # Generate the ics event string using randomly selected title from CSV
-        event_title = random.choice(titles)  # Randomly choose title here too
-        ics_event = generate_ics_event(short_start, short_end, event_title)
-        events.append((ics_event, short_start.hour, short_start.minute, short_duration, short_start, short_end))
-        event_count += 1
-        
-        # Update coverage tracking
-        overlap_covered += short_duration
-        attempts += 1
-    
-    # Add extra events if we're below the minimum target (9)
-    while event_count < 9:
-      # Find gaps between events
-      sorted_events = sorted([(start, end) for _, _, _, _, start, end in events])
-      gaps = []
-      
-      for i in range(len(sorted_events) - 1):
-        gap_start = sorted_events[i][1]
-        gap_end = sorted_events[i+1][0]
-        gap_duration = int((gap_end - gap_start).total_seconds() / 60)
-        
-        if gap_duration >= 30:  # Only consider gaps of at least 30 minutes
-          gaps.append((gap_start, gap_end))
-      
-      if not gaps:
-        break
-      
-      # Choose a random gap
-      gap_start, gap_end = random.choice(gaps)
-      
-      # Create an event in this gap
-      duration_minutes = min(random.choice([15, 30, 45]), int((gap_end - gap_start).total_seconds() / 60) - 5)
-      start_time = gap_start + datetime.timedelta(minutes=5)
-      end_time = start_time + datetime.timedelta(minutes=duration_minutes)
-      
-      # Generate event title
-      event_title = titles[event_count % len(titles)]
-      ics_event = generate_ics_event(start_time, end_time, event_title)
-      events.append((ics_event, start_time.hour, start_time.minute, duration_minutes, start_time, end_time))
-      event_count += 1
-    
-    # After generating events for this day
-    all_events.extend(events)
-    
-    # Store summary for this day
-    day_summaries.append({
-      'date': current_date.strftime('%Y-%m-%d'),
-      'event_count': len(events),
-      'end_time': f"{end_hour:02d}:{end_minute:02d}"
-    })
-  
-  # Generate filename based on date range
-  if days_to_generate == 1:
-    filename = f"events_{year}{month:02d}{day:02d}.ics"
-  else:
-    end_date = datetime.date(year, month, day) + datetime.timedelta(days=days_to_generate-1)
-    filename = f"events_{year}{month:02d}{day:02d}_to_{end_date.year}{end_date.month:02d}{end_date.day:02d}.ics"
-  
-  # Write all events to an ics file
-  with open(filename, "w") as f:
-    f.write(f"BEGIN:VCALENDAR\nVERSION:2.0\nPRODID:-//BusySchedule//EN\n")
-    for event, _, _, _, _, _ in all_events:
-      f.write(event)
-    f.write("END:VCALENDAR")
+  result = generate_schedule({
+    'start_date': datetime.date(year, month, day),
+    'days': days_to_generate,
+    'pattern': pattern,
+    'titles': titles,
+    'busy_ics': busy_ics,
+    'verbose': True,
+    'details': True,
+  })
 
   # Print information about the events
-  print(f"\nEvents generated successfully! Saved as {filename}")
-  print(f"Total events generated: {len(all_events)}")
-  
-  # Print summary for each day
-  print("\nSummary by day:")
-  for day_info in day_summaries:
-    print(f"Date: {day_info['date']}, Events: {day_info['event_count']}, Workday ending at: {day_info['end_time']}")
+  print_summary(result)
   
   # Print detailed event information if requested
   if ask_yes_no_question("Show detailed event information?"):
-    # Group events by day for better organization
-    events_by_day = {}
-    for event, hour, minute, duration, start, end in all_events:
-      day_key = start.strftime('%Y-%m-%d')
-      if day_key not in events_by_day:
-        events_by_day[day_key] = []
-      events_by_day[day_key].append((event, hour, minute, duration, start, end))
-    
-    # Print events grouped by day
-    for day_key in sorted(events_by_day.keys()):
-      print(f"\nEvents for {day_key}:")
-      for i, (_, hour, minute, duration_minutes, _, _) in enumerate(events_by_day[day_key]):
-        hours = duration_minutes // 60
-        minutes = duration_minutes % 60
-        duration_display = f"{hours} hours, {minutes} minutes" if hours > 0 else f"{minutes} minutes"
-        
-        print(f"Event {i+1}:")
-        print(f"  Start time: {hour:02d}:{minute:02d}")
-        print(f"  Duration: {duration_display}")
+    print_event_details(result['day_summaries'])
+
+def parse_args(argv=None):
+  """Parse the command line flags for non-interactive generation."""
+  parser = argparse.ArgumentParser(
+    description="Generate busy-schedule ics files. Runs interactively when no flags are given.")
+  parser.add_argument("--start-date", help="first day to generate (YYYY-MM-DD, default: today)")
+  parser.add_argument("--days", type=int, default=1, help="number of days to generate (default: 1)")
+  parser.add_argument("--pattern", choices=PATTERNS, default="even", help="event distribution pattern")
+  parser.add_argument("--titles", dest="titles_file", help="CSV file with event titles in the first column")
+  parser.add_argument("--no-repeat", type=int, default=0,
+                      help="keep a title from repeating within this many draws of a day")
+  parser.add_argument("--title", help="single event title to use when no CSV is given")
+  parser.add_argument("--seed", type=int, help="seed for reproducible output")
+  parser.add_argument("--output", help="output ics filename")
+  parser.add_argument("--engine", choices=ENGINES, default="python",
+                      help="day generator: per-event Python loop, NumPy bulk generator or precomputed templates")
+  parser.add_argument("--template-library", help="template library file for --engine templates (default: .day-templates)")
+  parser.add_argument("--template-pool", type=int,
+                      help="templates per density level; the library is rebuilt when this changes (default: 1000)")
+  parser.add_argument("--cache-dir", help="reuse previously generated days of seeded runs from this directory")
+  parser.add_argument("--cache-max-mb", type=float, default=64, help="size limit of the day cache (default: 64)")
+  parser.add_argument("--batch", help="JSON file with a list of config objects to generate in one run")
+  parser.add_argument("--workers", type=int, default=1,
+                      help="number of worker processes for --batch (0 = one per CPU core, default: 1)")
+  parser.add_argument("--quiet", action="store_true", help="only report errors")
+  parser.add_argument("--busy-ics", nargs="+", metavar="ICS",
+                      help="existing .ics files or directories to schedule around")
+  parser.add_argument("--delta-state",
+                      help="write only changes since the run recorded in this state file (created if missing)")
+  parser.add_argument("--profile", choices=profiling.FORMATS,
+                      help="record per-phase timings and counters as a table or JSON lines")
+  parser.add_argument("--profile-memory", action="store_true", help="also record tracemalloc peaks")
+  parser.add_argument("--profile-output", help="append the profile to this file (default: stderr)")
+  args = parser.parse_args(argv)
+  if args.days < 1:
+    parser.error("--days must be at least 1")
+  return args
+
+def generate_schedules(configs):
+  """Generate several schedules in one process, loading each titles CSV once."""
+  titles_cache = {}
+  return [generate_schedule(config, titles_cache) for config in configs]
+
+# Per-process titles cache so each pool worker loads a CSV at most once
+_worker_titles_cache = {}
+
+def _generate_schedule_job(config):
+  """Run one schedule job inside a pool worker and return its summary."""
+  return generate_schedule(config, _worker_titles_cache)
+
+def generate_schedules_parallel(configs, workers=None):
+  """Generate schedules across a process pool, one worker per core by default.
+
+  Every job writes its own ics file. Results come back in the order of
+  configs. Seeded jobs produce the same output as generate_schedule().
+  """
+  configs = list(configs)
+  if not configs:
+    return []
+  workers = min(workers or os.cpu_count() or 1, len(configs))
+  # Hand out jobs in chunks so small calendars don't pay one round-trip each
+  chunksize = max(1, len(configs) // (workers * 4))
+  # Loaded here so single runs don't pay for importing multiprocessing
+  from concurrent.futures import ProcessPoolExecutor
+  with ProcessPoolExecutor(max_workers=workers) as executor:
+    return list(executor.map(_generate_schedule_job, configs, chunksize=chunksize))
+
+def run_cli(argv=None):
+  """Entry point for the non-interactive command line; returns the exit status."""
+  args = parse_args(argv)
+
+  try:
+    if args.batch:
+      with open(args.batch, 'r') as f:
+        configs = json.load(f)
+    else:
+      configs = [{
+        'start_date': args.start_date,
+        'days': args.days,
+        'pattern': args.pattern,
+        'titles_file': args.titles_file,
+        'titles': [args.title] if args.title else None,
+        'no_repeat': args.no_repeat,
+        'seed': args.seed,
+        'output': args.output,
+        'engine': args.engine,
+        'template_library': args.template_library,
+        'template_pool': args.template_pool,
+        'busy_ics': args.busy_ics,
+        'delta_state': args.delta_state,
+      }]
+    for config in configs:
+      if args.cache_dir:
+        config.setdefault('cache_dir', args.cache_dir)
+        config.setdefault('cache_max_mb', args.cache_max_mb)
+      if args.profile:
+        config.setdefault('profile', args.profile)
+        config.setdefault('profile_memory', args.profile_memory)
+        config.setdefault('profile_output', args.profile_output)
+
+    if args.workers == 1 or len(configs) == 1:
+      results = generate_schedules(configs)
+    else:
+      results = generate_schedules_parallel(configs, args.workers or None)
+  except (ValueError, OSError) as e:
+    print(f"Error: {e}", file=sys.stderr)
+    return 1
+
+  for result in results:
+    if not args.quiet:
+      cache_info = ""
+      if 'cache_hits' in result:
+        cache_info = f" ({result['cache_hits']} cached, {result['cache_misses']} generated)"
+      if 'delta' in result:
+        delta = result['delta']
+        cache_info += (f", update: {delta['added']} added, {delta['modified']} modified, "
+                       f"{delta['cancelled']} cancelled, {delta['unchanged']} unchanged")
+      print(f"{result['filename']}: {result['total_events']} events over {len(result['day_summaries'])} day(s){cache_info}")
+  return 0
 
 if __name__ == "__main__":
-  main()
\ No newline at end of file
+  if len(sys.argv) > 1:
+    sys.exit(run_cli())
+  else:
+    main()
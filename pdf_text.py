@@ -0,0 +1,139 @@
+"""Parallel, cached PDF text extraction.
+
+Pages are extracted in batches on a process pool, and the page texts are
+joined once at the end. Extracted pages are cached per document, keyed by
+a hash of the file content, so re-running on an unchanged PDF skips
+parsing. Pages missing from the cache, e.g. beyond an earlier max_chars
+stop, are extracted and added on the next run that needs them.
+
+With max_chars, extraction goes through the pages in order and stops once
+that much text has been collected. It starts with a single page and
+doubles the pages read per round, and single batches run in-process, so a
+short read such as the prompt excerpt never pays for starting the pool.
+"""
+import os
+import json
+import hashlib
+import tempfile
+from functools import lru_cache
+
+DEFAULT_CACHE_DIR = ".pdf-cache"
+PAGES_PER_TASK = 8
+
+def file_digest(path, block_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _open_reader(pdf_path):
+    # Keyed by mtime and size too, so a PDF rewritten in place is opened again
+    stat = os.stat(pdf_path)
+    return _cached_reader(pdf_path, stat.st_mtime_ns, stat.st_size)
+
+@lru_cache(maxsize=4)
+def _cached_reader(pdf_path, mtime_ns, size):
+    import PyPDF2  # Only needed when pages are not cached
+    return PyPDF2.PdfReader(pdf_path)
+
+def count_pages(pdf_path):
+    """Return the number of pages in a PDF."""
+    return len(_open_reader(pdf_path).pages)
+
+def extract_pages(pdf_path, page_numbers):
+    """Return the text of the given pages; runs in a worker process."""
+    reader = _open_reader(pdf_path)
+    return [reader.pages[number].extract_text() or "" for number in page_numbers]
+
+class PageTextCache:
+    """One JSON file per document holding its page count and extracted pages."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, digest):
+        return os.path.join(self.directory, digest + ".json")
+
+    def load(self, digest):
+        """Return (page_count, {page: text}), or (None, {}) when not cached."""
+        try:
+            with open(self._path(digest), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            return entry["page_count"], {int(page): text for page, text in entry["pages"].items()}
+        except (FileNotFoundError, ValueError, KeyError):
+            return None, {}
+
+    def save(self, digest, page_count, pages):
+        payload = json.dumps({"page_count": page_count, "pages": pages})
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(payload)
+        os.replace(temp_path, self._path(digest))
+
+def _batches(page_numbers, size):
+    return [page_numbers[i:i + size] for i in range(0, len(page_numbers), size)]
+
+def extract_text(pdf_path, first_page=0, last_page=None, max_chars=None, workers=None,
+                 cache_dir=DEFAULT_CACHE_DIR):
+    """Extract the text of pages [first_page, last_page) as one string.
+
+    Each non-empty page contributes its text plus a newline. With max_chars,
+    extraction stops after the page that reaches the limit. workers=None
+    uses one process per CPU; cache_dir=None disables the cache.
+    """
+    cache = PageTextCache(cache_dir) if cache_dir else None
+    digest = file_digest(pdf_path) if cache else None
+    page_count, pages = cache.load(digest) if cache else (None, {})
+    known_pages = len(pages)
+    if page_count is None:
+        page_count = count_pages(pdf_path)
+    if page_count == 0:
+        raise ValueError("PDF contains no pages")
+
+    wanted = list(range(first_page, page_count if last_page is None else min(last_page, page_count)))
+    workers = workers or os.cpu_count() or 1
+    executor = None
+    parts = []
+    collected = 0
+    position = 0
+    try:
+        while position < len(wanted):
+            if max_chars is None:
+                wave = wanted[position:]
+            else:
+                wave = wanted[position:position + min(max(position, 1), workers * PAGES_PER_TASK)]
+            position += len(wave)
+
+            missing = [number for number in wave if number not in pages]
+            batches = _batches(missing, PAGES_PER_TASK)
+            if len(batches) > 1 and workers > 1:
+                if executor is None:
+                    from concurrent.futures import ProcessPoolExecutor
+                    executor = ProcessPoolExecutor(max_workers=min(workers, len(batches)))
+                results = executor.map(extract_pages, [pdf_path] * len(batches), batches)
+            else:
+                results = (extract_pages(pdf_path, batch) for batch in batches)
+            for batch, texts in zip(batches, results):
+                pages.update(zip(batch, texts))
+
+            stop = False
+            for number in wave:
+                text = pages[number]
+                if text:
+                    parts.append(text)
+                    collected += len(text) + 1
+                if max_chars is not None and collected >= max_chars:
+                    stop = True
+                    break
+            if stop:
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    if cache and len(pages) != known_pages:
+        cache.save(digest, page_count, pages)
+    return "".join(text + "\n" for text in parts)
@@ -0,0 +1,174 @@
+"""Optional phase-level instrumentation for schedule generation.
+
+main.generate_schedule() installs a Profiler as main.profiler when the
+'profile' config key is set. The generator checks that global once per
+phase, so a run without profiling pays a handful of None checks per day.
+
+Recorded per run and per day:
+
+* wall time of each phase: first_pass, long_event_overlaps, gap_filler,
+  title_sampling (also counted inside the passes that draw titles),
+  cache_lookup, cache_store, vectorized_generation, template_lookup,
+  busy_fit (fitting around imported calendars), serialization and
+  file_write
+* iteration counts of the first pass, the overlap pass and the gap filler,
+  and events dropped because they didn't fit around imported busy time
+* events per day
+* tracemalloc peaks, when trace_memory is enabled (this slows the run)
+
+The report is either a summary table or JSON lines: one "day" record per
+day as it is written, then a "summary" record.
+"""
+import sys
+import json
+import time
+import tracemalloc
+from collections import defaultdict
+
+FORMATS = ("table", "jsonl")
+
+class Profiler:
+    """Collect phase timings and counters for one generate_schedule() run."""
+
+    def __init__(self, output_format="table", trace_memory=False, output=None):
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown profile format '{output_format}', expected one of {', '.join(FORMATS)}")
+        self.output_format = output_format
+        self.trace_memory = trace_memory
+        self.output = output
+        self.clock = time.perf_counter
+        self.phase_seconds = defaultdict(float)
+        self.phase_calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self.days = 0
+        self.events = 0
+        self.min_events = None
+        self.max_events = 0
+        self.total_seconds = 0.0
+        self.peak_memory = None
+        self._day_seconds = defaultdict(float)
+        self._day_counters = defaultdict(int)
+        self._started = None
+        self._stream = None
+        self._owns_stream = False
+
+    def start(self):
+        if self.trace_memory:
+            tracemalloc.start()
+        self._started = self.clock()
+
+    def stop(self):
+        self.total_seconds = self.clock() - self._started
+        if self.trace_memory:
+            self._note_peak()
+            tracemalloc.stop()
+
+    def _note_peak(self):
+        peak = tracemalloc.get_traced_memory()[1]
+        self.peak_memory = max(self.peak_memory or 0, peak)
+        return peak
+
+    def add(self, phase, seconds):
+        """Add the wall time of one run of a phase."""
+        self.phase_seconds[phase] += seconds
+        self.phase_calls[phase] += 1
+        self._day_seconds[phase] += seconds
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+        self._day_counters[name] += amount
+
+    def timed(self, phase, func):
+        """Wrap func so every call is added to phase."""
+        clock = self.clock
+        add = self.add
+
+        def wrapper(*args):
+            start = clock()
+            result = func(*args)
+            add(phase, clock() - start)
+            return result
+        return wrapper
+
+    def end_day(self, current_date, event_count):
+        """Close the record of one day and emit it in JSON lines mode."""
+        self.days += 1
+        self.events += event_count
+        self.max_events = max(self.max_events, event_count)
+        self.min_events = event_count if self.min_events is None else min(self.min_events, event_count)
+        if self.output_format == "jsonl":
+            record = {
+                'type': 'day',
+                'date': current_date.isoformat(),
+                'events': event_count,
+                'phases': {phase: round(seconds, 6) for phase, seconds in self._day_seconds.items()},
+                'counters': dict(self._day_counters),
+            }
+            if self.trace_memory:
+                record['peak_kb'] = round(self._note_peak() / 1024, 1)
+            self._write(json.dumps(record) + "\n")
+        if self.trace_memory:
+            self._note_peak()
+            tracemalloc.reset_peak()
+        self._day_seconds.clear()
+        self._day_counters.clear()
+
+    def summary(self):
+        """Return the run totals as a dict."""
+        summary = {
+            'type': 'summary',
+            'days': self.days,
+            'events': self.events,
+            'events_per_day': {
+                'min': self.min_events or 0,
+                'mean': round(self.events / self.days, 2) if self.days else 0,
+                'max': self.max_events,
+            },
+            'total_seconds': round(self.total_seconds, 6),
+            'phases': {phase: {'seconds': round(seconds, 6), 'calls': self.phase_calls[phase]}
+                       for phase, seconds in self.phase_seconds.items()},
+            'counters': dict(self.counters),
+        }
+        if self.peak_memory is not None:
+            summary['peak_kb'] = round(self.peak_memory / 1024, 1)
+        return summary
+
+    def format_table(self):
+        summary = self.summary()
+        total = summary['total_seconds'] or 1.0
+        per_day = summary['events_per_day']
+        lines = [
+            f"Profile: {summary['days']} days, {summary['events']} events "
+            f"({per_day['min']}/{per_day['mean']}/{per_day['max']} min/mean/max per day), "
+            f"{summary['total_seconds'] * 1000:.1f} ms total",
+            f"{'phase':<24} {'ms':>10} {'%':>6} {'calls':>9}",
+        ]
+        for phase, values in sorted(summary['phases'].items(), key=lambda item: -item[1]['seconds']):
+            lines.append(f"{phase:<24} {values['seconds'] * 1000:>10.2f} "
+                         f"{values['seconds'] / total * 100:>6.1f} {values['calls']:>9}")
+        if summary['counters']:
+            lines.append(f"{'counter':<24} {'total':>10} {'per day':>16}")
+            for name, value in sorted(summary['counters'].items()):
+                lines.append(f"{name:<24} {value:>10} {value / max(summary['days'], 1):>16.2f}")
+        if 'peak_kb' in summary:
+            lines.append(f"tracemalloc peak: {summary['peak_kb']:,.1f} KB")
+        return "\n".join(lines) + "\n"
+
+    def report(self):
+        """Write the summary (table or final JSON line) and close the output."""
+        if self.output_format == "jsonl":
+            self._write(json.dumps(self.summary()) + "\n")
+        else:
+            self._write(self.format_table())
+        if self._owns_stream:
+            self._stream.close()
+        self._stream = None
+
+    def _write(self, text):
+        if self._stream is None:
+            if self.output:
+                self._stream = open(self.output, "a", encoding="utf-8")
+                self._owns_stream = True
+            else:
+                self._stream = sys.stderr
+        self._stream.write(text)
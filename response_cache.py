@@ -0,0 +1,165 @@
+"""On-disk cache of model responses.
+
+CachedModel sits in front of a model's generate_content and stores each
+response text in a file named after a hash of the model name and prompt.
+Re-running generate-csv.py with the same task type, count and PDF answers
+from disk instantly, without using API quota.
+
+Chunked generation sends the same prompt several times in one run and
+expects different answers. The nth identical prompt of a run therefore gets
+its own cache entry, and a repeat run replays the same sequence.
+
+Entries older than the TTL are ignored and removed. Reads refresh a file's
+modification time, and when the cache grows past its size limit the least
+recently used entries are deleted first.
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import tempfile
+import threading
+
+DEFAULT_CACHE_DIR = ".llm-cache"
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+
+class CachedResponse:
+    """Response object exposing .text like the Gemini SDK."""
+
+    def __init__(self, text):
+        self.text = text
+
+class ResponseCache:
+    """Size- and age-bounded store of response texts keyed by prompt hash."""
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES,
+                 ttl_seconds=DEFAULT_TTL_SECONDS):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        self._size = sum(entry.stat().st_size for entry in self._entries())
+
+    def _entries(self):
+        for shard in os.scandir(self.directory):
+            if shard.is_dir():
+                yield from (entry for entry in os.scandir(shard.path) if entry.name.endswith(".json"))
+
+    @staticmethod
+    def key(model_name, prompt, occurrence=0):
+        """Return the cache key for the occurrence-th identical prompt to a model."""
+        digest = hashlib.sha256()
+        digest.update(model_name.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(prompt.encode("utf-8"))
+        digest.update(f"\0{occurrence}".encode("ascii"))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + ".json")
+
+    def get(self, key):
+        """Return the cached text for key, or None if missing or expired."""
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            expired = self.ttl_seconds is not None and time.time() - entry["created"] > self.ttl_seconds
+            if expired:
+                os.remove(path)
+            else:
+                os.utime(path)  # mark as recently used
+        except (FileNotFoundError, ValueError, KeyError):
+            self.misses += 1
+            return None
+        if expired:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["text"]
+
+    def put(self, key, text):
+        """Store a response text and evict old entries if over the size limit."""
+        payload = json.dumps({"created": time.time(), "text": text}).encode("utf-8")
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write to a temp file first so a crash never leaves half an entry
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(temp_path, path)
+        self._size += len(payload)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def evict(self, target_fraction=0.9):
+        """Delete least recently used entries until the cache fits in target_fraction of its limit."""
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        self._size = sum(size for _, size, _ in entries)
+        target = self.max_bytes * target_fraction
+        for _, size, path in sorted(entries):
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+
+class CachedModel:
+    """Wrap a model so generate_content answers from a ResponseCache when it can."""
+
+    def __init__(self, model, cache):
+        self.model = model
+        self.cache = cache
+        self.model_name = getattr(model, "model_name", type(model).__name__)
+        self._occurrences = {}
+        self._lock = threading.Lock()
+
+    def _key(self, prompt):
+        with self._lock:
+            occurrence = self._occurrences.get(prompt, 0)
+            self._occurrences[prompt] = occurrence + 1
+        return self.cache.key(self.model_name, prompt, occurrence)
+
+    def _stream_and_store(self, key, chunks):
+        parts = []
+        for chunk in chunks:
+            parts.append(chunk.text)
+            yield chunk
+        # Only a fully consumed stream is a complete response
+        self.cache.put(key, "".join(parts))
+
+    def generate_content(self, prompt, stream=False):
+        key = self._key(prompt)
+        text = self.cache.get(key)
+        if stream:
+            if text is not None:
+                return iter([CachedResponse(text)])
+            return self._stream_and_store(key, self.model.generate_content(prompt, stream=True))
+        if text is None:
+            text = self.model.generate_content(prompt).text
+            self.cache.put(key, text)
+        return CachedResponse(text)
+
+    async def generate_content_async(self, prompt):
+        key = self._key(prompt)
+        text = self.cache.get(key)
+        if text is None:
+            if hasattr(self.model, "generate_content_async"):
+                response = await self.model.generate_content_async(prompt)
+            else:
+                response = await asyncio.to_thread(self.model.generate_content, prompt)
+            text = response.text
+            self.cache.put(key, text)
+        return CachedResponse(text)
@@ -1,5 +1,5 @@
-import subprocess
 import os
+import importlib
 
 def ask_yes_no_question(question, default="y"):
     """Ask a yes/no question with default 'y' when pressing enter."""
@@ -14,48 +14,71 @@ def find_ics_files():
     ics_files = [f for f in os.listdir(current_dir) if f.endswith('.ics')]
     return sorted(ics_files)  # Sort the list alphabetically
 
-# Run the generate-csv.py script
-if ask_yes_no_question("Run generate-csv.py?"):
-    subprocess.run(["python", "generate-csv.py"])
+def run_generate_csv():
+    """Run the task generator in this process."""
+    # The hyphen in the file name rules out a plain import statement
+    generate_csv = importlib.import_module("generate-csv")
+    generate_csv.main([])
 
-# Ask to run the main.py script
-if ask_yes_no_question("Run main.py?"):
-    subprocess.run(["python", "main.py"])
+def run_main():
+    """Run the interactive calendar generator in this process."""
+    import main as calendar_generator
+    calendar_generator.main()
 
-# Find all .ics files
-ics_files = find_ics_files()
+def run_stage(name, stage):
+    """Run one stage, reporting errors instead of ending the whole session."""
+    try:
+        stage()
+    except Exception as e:
+        print(f"{name} failed: {e}")
 
-if not ics_files:
-    print("No .ics files found in the directory.")
-    if ask_yes_no_question("Open the folder instead?"):
-        folder_path = os.path.dirname(os.path.abspath(__file__))
-        os.startfile(folder_path)
-else:
-    print(f"Found {len(ics_files)} .ics files")
+def run():
+    """Generate tasks and events in-process, then offer to open the results."""
+    # Run the generate-csv.py script
+    if ask_yes_no_question("Run generate-csv.py?"):
+        run_stage("generate-csv.py", run_generate_csv)
+
+    # Ask to run the main.py script
+    if ask_yes_no_question("Run main.py?"):
+        run_stage("main.py", run_main)
+
+    # Find all .ics files
+    ics_files = find_ics_files()
+
+    if not ics_files:
+        print("No .ics files found in the directory.")
+        if ask_yes_no_question("Open the folder instead?"):
+            folder_path = os.path.dirname(os.path.abspath(__file__))
+            os.startfile(folder_path)
+    else:
+        print(f"Found {len(ics_files)} .ics files")
     
-    # Cycle through .ics files until user selects one or chooses to exit
-    opened_file = False
-    i = 0
-    while not opened_file and i < len(ics_files) * 2:  # Limit cycles to avoid infinite loop
-        current_file = ics_files[i % len(ics_files)]
+        # Cycle through .ics files until user selects one or chooses to exit
+        opened_file = False
+        i = 0
+        while not opened_file and i < len(ics_files) * 2:  # Limit cycles to avoid infinite loop
+            current_file = ics_files[i % len(ics_files)]
         
-        if ask_yes_no_question(f"Open '{current_file}'?"):
-            ics_file_path = os.path.abspath(current_file)
-            try:
-                os.startfile(ics_file_path)
-                opened_file = True
-                print(f"Opened {current_file}")
-            except Exception as e:
-                print(f"Error opening file: {e}")
-        else:
-            i += 1
+            if ask_yes_no_question(f"Open '{current_file}'?"):
+                ics_file_path = os.path.abspath(current_file)
+                try:
+                    os.startfile(ics_file_path)
+                    opened_file = True
+                    print(f"Opened {current_file}")
+                except Exception as e:
+                    print(f"Error opening file: {e}")
+            else:
+                i += 1
             
-            # After cycling through all files once, check if we should continue
-            if i > 0 and i % len(ics_files) == 0:
-                if not ask_yes_no_question("Check files again?"):
-                    break
+                # After cycling through all files once, check if we should continue
+                if i > 0 and i % len(ics_files) == 0:
+                    if not ask_yes_no_question("Check files again?"):
+                        break
     
-    # If no file was opened, offer to open the folder
-    if not opened_file and ask_yes_no_question("Open folder instead?"):
-        folder_path = os.path.dirname(os.path.abspath(__file__))
-        os.startfile(folder_path)
\ No newline at end of file
+        # If no file was opened, offer to open the folder
+        if not opened_file and ask_yes_no_question("Open folder instead?"):
+            folder_path = os.path.dirname(os.path.abspath(__file__))
+            os.startfile(folder_path)
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,88 @@
+"""Local stand-in for the Gemini model.
+
+StubModel answers task-generation prompts without any network access. It
+reads the requested count from the prompt ("Generate N ...") and returns
+that many made-up task titles in the loose formatting real models use
+(bullets, numbering, blank lines). Latency, failures and duplicate rates
+are configurable, so chunking, rate limiting and retries can be exercised
+locally. With stream=True the response arrives as a series of small
+text chunks, like the streaming Gemini API.
+"""
+import re
+import time
+import random
+import asyncio
+
+_COUNT_PATTERN = re.compile(r"Generate (\d+)")
+
+_VERBS = ["Review", "Update", "Prepare", "Finalize", "Draft", "Schedule", "Audit", "Sync on",
+          "Plan", "Document", "Test", "Present", "Refine", "Analyze", "Coordinate"]
+_OBJECTS = ["quarterly budget", "project roadmap", "client proposal", "release notes",
+            "team retrospective", "vendor contract", "onboarding checklist", "sprint backlog",
+            "risk register", "design mockups", "training materials", "KPI dashboard",
+            "incident report", "hiring plan", "migration runbook"]
+_SUFFIXES = ["for Q3", "with finance", "before launch", "for leadership", "with stakeholders",
+             "for the pilot", "draft two", "and share feedback", "for next sprint", "with legal"]
+_PREFIXES = ["", "- ", "* ", "{n}. ", "{n}) "]
+
+class StubResponse:
+    """Minimal response object exposing .text like the Gemini SDK."""
+
+    def __init__(self, text):
+        self.text = text
+
+class StubError(Exception):
+    """Transient failure raised by StubModel when failure_rate triggers."""
+
+class StubModel:
+    """Deterministic fake generative model for tests and benchmarks."""
+
+    def __init__(self, latency=0.0, failure_rate=0.0, duplicate_rate=0.0, seed=0,
+                 model_name="stub-model"):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.duplicate_rate = duplicate_rate
+        self.model_name = model_name
+        self.calls = 0
+        self._rng = random.Random(seed)
+
+    def _task(self):
+        return f"{self._rng.choice(_VERBS)} {self._rng.choice(_OBJECTS)} {self._rng.choice(_SUFFIXES)}"
+
+    def _respond(self, prompt):
+        self.calls += 1
+        if self._rng.random() < self.failure_rate:
+            raise StubError("stub model: simulated transient failure")
+        match = _COUNT_PATTERN.search(prompt)
+        count = int(match.group(1)) if match else 10
+        lines = []
+        previous = None
+        for n in range(1, count + 1):
+            if previous and self._rng.random() < self.duplicate_rate:
+                task = previous
+            else:
+                task = self._task()
+            prefix = self._rng.choice(_PREFIXES).format(n=n)
+            lines.append(prefix + task)
+            previous = task
+        return "\n".join(lines) + "\n"
+
+    def _stream(self, text, chunk_chars=24):
+        pieces = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)]
+        delay = self.latency / len(pieces) if pieces else 0.0
+        for piece in pieces:
+            if delay:
+                time.sleep(delay)
+            yield StubResponse(piece)
+
+    def generate_content(self, prompt, stream=False):
+        if stream:
+            return self._stream(self._respond(prompt))
+        if self.latency:
+            time.sleep(self.latency)
+        return StubResponse(self._respond(prompt))
+
+    async def generate_content_async(self, prompt):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return StubResponse(self._respond(prompt))
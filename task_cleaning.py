@@ -0,0 +1,188 @@
+"""Cleaning and deduplication of candidate task lines.
+
+All task sources (model responses, PDF text) go through the same stage:
+
+* Bullets, checkboxes and numbering are stripped with one precompiled
+  pattern, and lines outside the length limits are dropped.
+* Exact duplicates (ignoring case, punctuation and spacing) are dropped by
+  hashing the normalized text.
+* Near duplicates are dropped by the Jaccard similarity of their word
+  sets, ignoring a few filler words, so "Review budget" and "Review the
+  budget" count as the same task. Candidates are found with MinHash and
+  locality-sensitive hashing: each word set gets a signature of
+  SIGNATURE_ROWS minimum hashes, split into bands of BAND_ROWS rows, and
+  tasks sharing a band with an earlier task are candidates. Every
+  candidate is confirmed with the exact Jaccard similarity before a line
+  is dropped. A band only remembers its newest BAND_CAPACITY tasks, so
+  titles built from the same template words can't turn each new line
+  into a scan over all earlier ones.
+
+TaskCleaner works on a stream, so lines are processed as they arrive and
+memory grows only with the number of kept tasks.
+"""
+import re
+import hashlib
+from functools import lru_cache
+
+DEFAULT_NEAR_DUPLICATE_THRESHOLD = 0.8
+# 32 rows of 15 bits come from one 64-byte BLAKE2b digest per word. Bands
+# of 4 rows find pairs at the 0.8 threshold about 98% of the time.
+SIGNATURE_ROWS = 32
+BAND_ROWS = 4
+BAND_CAPACITY = 8
+# Words that don't make two tasks different
+STOP_WORDS = frozenset(["a", "an", "and", "the", "of", "for", "to", "on", "in", "at", "by", "with"])
+
+_BULLET = re.compile(r"^(?:[-*•□☐◻] |\d+[.)] )")
+_NON_WORD = re.compile(r"[^\w\s]+")
+_SPACES = re.compile(r"\s+")
+
+def strip_bullet(line):
+    """Strip whitespace and one leading bullet, checkbox or number from a line."""
+    task = line.strip()
+    match = _BULLET.match(task)
+    return task[match.end():] if match else task
+
+def normalize(task):
+    """Lowercase, drop punctuation and collapse whitespace for comparisons."""
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", task.lower())).strip()
+
+def word_set(text):
+    """Return the words of normalized text as a set, without stop words.
+
+    A repeated word adds one more token per repetition, so "Draft notes
+    draft two" keeps both drafts. If the text only has stop words, they are
+    kept.
+    """
+    words = [word for word in text.split() if word not in STOP_WORDS] or text.split()
+    if len(set(words)) == len(words):
+        return frozenset(words)
+    seen = {}
+    tokens = []
+    for word in words:
+        seen[word] = seen.get(word, 0) + 1
+        tokens.append(word if seen[word] == 1 else f"{word}#{seen[word]}")
+    return frozenset(tokens)
+
+# A signature is one int holding SIGNATURE_ROWS 16-bit lanes. Values use
+# the low 15 bits of each lane; the top bit is a guard for _min_lanes().
+_ROW_BITS = 16
+_VALUES = int.from_bytes(b"\xff\x7f" * SIGNATURE_ROWS, "little")
+_GUARDS = int.from_bytes(b"\x00\x80" * SIGNATURE_ROWS, "little")
+_BAND_BITS = _ROW_BITS * BAND_ROWS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+@lru_cache(maxsize=65536)
+def word_hashes(word):
+    """Return SIGNATURE_ROWS independent 15-bit hashes of a word as signature lanes."""
+    digest = hashlib.blake2b(word.encode("utf-8"), digest_size=SIGNATURE_ROWS * 2).digest()
+    return int.from_bytes(digest, "little") & _VALUES
+
+def _min_lanes(a, b):
+    # Per lane, (a | guard) - b keeps the guard bit exactly where a >= b and
+    # never borrows from the next lane. The guard bits become a mask that
+    # takes b in those lanes and a elsewhere.
+    take_b = (((a | _GUARDS) - b) & _GUARDS) >> (_ROW_BITS - 1)
+    return a ^ ((a ^ b) & (take_b * 0x7FFF))
+
+def lsh_bands(words):
+    """Return the LSH band keys of a set of words.
+
+    The MinHash signature holds the smallest hash of any word for each of
+    the SIGNATURE_ROWS hash functions. Two sets agree in one row with a
+    probability equal to their Jaccard similarity, so they share a band of
+    BAND_ROWS rows mostly when they are similar. All rows are compared at
+    once as lanes of one integer instead of one min() per row.
+    """
+    if not words:
+        return []
+    words = iter(words)
+    signature = word_hashes(next(words))
+    for word in words:
+        signature = _min_lanes(signature, word_hashes(word))
+    return [hash((i, signature >> (i * _BAND_BITS) & _BAND_MASK))
+            for i in range(SIGNATURE_ROWS // BAND_ROWS)]
+
+def jaccard(a, b):
+    """Return the Jaccard similarity of two sets."""
+    shared = len(a & b)
+    union = len(a) + len(b) - shared
+    return shared / union if union else 1.0
+
+class TaskCleaner:
+    """Streaming clean-and-dedupe stage for candidate task lines."""
+
+    def __init__(self, min_length=1, max_length=None,
+                 near_duplicate_threshold=DEFAULT_NEAR_DUPLICATE_THRESHOLD):
+        self.min_length = min_length
+        self.max_length = max_length
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.kept = 0
+        self.rejected = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self._hashes = set()
+        self._bands = {}  # LSH band -> index (or list of indexes) of kept tasks
+        self._words = []
+
+    def clean(self, line):
+        """Return the cleaned task for a line, or None if it is blank or out of range."""
+        task = strip_bullet(line)
+        if not task or len(task) < self.min_length or (self.max_length and len(task) > self.max_length):
+            return None
+        return task
+
+    def add(self, task):
+        """Record a cleaned task; return False if it duplicates an earlier one."""
+        key = normalize(task)
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+        if digest in self._hashes:
+            self.exact_duplicates += 1
+            return False
+
+        if self.near_duplicate_threshold is not None:
+            words = word_set(key)
+            bands = lsh_bands(words)
+            candidates = set()
+            for band in bands:
+                found = self._bands.get(band)
+                if found is None:
+                    continue
+                if type(found) is int:
+                    candidates.add(found)
+                else:
+                    candidates.update(found)
+            for candidate in candidates:
+                if jaccard(words, self._words[candidate]) >= self.near_duplicate_threshold:
+                    self.near_duplicates += 1
+                    return False
+            index = len(self._words)
+            self._words.append(words)
+            for band in bands:
+                candidates = self._bands.get(band)
+                if candidates is None:
+                    self._bands[band] = index  # Most bands hold one task; skip the list
+                elif type(candidates) is int:
+                    self._bands[band] = [candidates, index]
+                elif len(candidates) < BAND_CAPACITY:
+                    candidates.append(index)
+                else:
+                    # Full: newer tasks take over the slots of older ones
+                    candidates[index % BAND_CAPACITY] = index
+
+        self._hashes.add(digest)
+        self.kept += 1
+        return True
+
+    def process(self, lines):
+        """Yield the cleaned, previously unseen tasks from an iterable of lines."""
+        for line in lines:
+            task = self.clean(line)
+            if task is None:
+                self.rejected += 1
+            elif self.add(task):
+                yield task
+
+def clean_tasks(lines, **options):
+    """Clean and deduplicate lines in one go; options are passed to TaskCleaner."""
+    return list(TaskCleaner(**options).process(lines))
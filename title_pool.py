@@ -0,0 +1,227 @@
+"""Scalable title store for event generation.
+
+TitlePool indexes a titles CSV without loading it: one pass records the byte
+offset of every row in an array, and titles are decoded on demand from an
+mmap of the file. Memory is a few bytes per row instead of a Python string
+per title, so multi-million-line title libraries start quickly.
+
+An optional numeric second column weights the titles. Weighted sampling
+uses Vose's alias method, so every draw is constant-time and uses a single
+random number. A no-repeat window keeps the same title from showing up
+again within the last N draws of a day.
+"""
+import io
+import os
+import csv
+import mmap
+import hashlib
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from collections import deque
+
+# Resample this many times before drawing from the titles outside the window directly
+MAX_REPEAT_RETRIES = 8
+
+def build_alias_table(weights):
+    """Build Vose alias tables (probability, alias) for a weight array."""
+    n = len(weights)
+    total = sum(weights)
+    probability = array("d", (weight * n / total for weight in weights))
+    alias = array("I", bytes(4 * n))
+    small = [i for i in range(n) if probability[i] < 1.0]
+    large = [i for i in range(n) if probability[i] >= 1.0]
+    while small and large:
+        less = small.pop()
+        more = large.pop()
+        alias[less] = more
+        probability[more] -= 1.0 - probability[less]
+        if probability[more] < 1.0:
+            small.append(more)
+        else:
+            large.append(more)
+    # Leftovers are 1.0 up to rounding error
+    for i in small + large:
+        probability[i] = 1.0
+    return probability, alias
+
+def _parse_row(text):
+    return next(csv.reader(io.StringIO(text)), [])
+
+def _parse_weight(row):
+    if len(row) < 2:
+        return 1.0
+    try:
+        weight = float(row[1])
+    except ValueError:
+        return 1.0
+    return weight if weight > 0 else 0.0
+
+class TitlePool:
+    """Indexed, lazily decoded collection of event titles."""
+
+    def __init__(self, offsets, path=None, titles=None, weights=None, digest=None, no_repeat=0):
+        self._offsets = offsets
+        self._path = path
+        self._titles = titles
+        self._mmap = None
+        self._size = None
+        self.digest = digest
+        self.no_repeat = no_repeat
+        self._probability = None
+        self._alias = None
+        self._cumulative = None
+        self._drawable = len(self)  # Titles with a weight above zero
+        if weights is not None:
+            if not any(weights):
+                raise ValueError("All title weights are zero")
+            self._probability, self._alias = build_alias_table(weights)
+            self._cumulative = array("d", accumulate(weights))
+            self._drawable = sum(1 for weight in weights if weight > 0)
+
+    @classmethod
+    def from_csv(cls, path, no_repeat=0):
+        """Index a CSV file of titles (first column) and optional weights (second column)."""
+        offsets = array("Q")
+        weights = None  # Only allocated once a row has a weight other than 1
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            position = 0
+            record_start = 0
+            in_quotes = False
+            record = []
+            for line in f:
+                digest.update(line)
+                if not in_quotes:
+                    record_start = position
+                    record = []
+                record.append(line)
+                position += len(line)
+                # A quoted field can span lines; an odd quote count flips the state
+                if line.count(b'"') % 2:
+                    in_quotes = not in_quotes
+                if in_quotes:
+                    continue
+                raw = b"".join(record) if len(record) > 1 else line
+                if not raw.strip():
+                    continue  # Skip empty rows
+                offsets.append(record_start)
+                weight = 1.0
+                if b"," in raw:
+                    weight = _parse_weight(_parse_row(raw.decode("utf-8", "replace")))
+                if weights is not None:
+                    weights.append(weight)
+                elif weight != 1.0:
+                    weights = array("d", [1.0]) * (len(offsets) - 1)
+                    weights.append(weight)
+        return cls(offsets, path=path, weights=weights, digest=digest.hexdigest(), no_repeat=no_repeat)
+
+    @classmethod
+    def from_titles(cls, titles, no_repeat=0):
+        """Wrap an in-memory list of titles."""
+        digest = hashlib.sha1()
+        for title in titles:
+            digest.update(title.encode("utf-8"))
+            digest.update(b"\n")
+        return cls(None, titles=list(titles), digest=digest.hexdigest(), no_repeat=no_repeat)
+
+    @property
+    def cache_key(self):
+        """Identify the titles and sampling settings days were generated with."""
+        return f"{self.digest}/{self.no_repeat}"
+
+    def __len__(self):
+        if self._titles is not None:
+            return len(self._titles)
+        return len(self._offsets)
+
+    def _open(self):
+        with open(self._path, "rb") as f:
+            self._size = os.fstat(f.fileno()).st_size
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __getitem__(self, index):
+        if self._titles is not None:
+            return self._titles[index]
+        if self._mmap is None:
+            self._open()
+        start = self._offsets[index]
+        end = self._offsets[index + 1] if index + 1 < len(self._offsets) else self._size
+        text = self._mmap[start:end].decode("utf-8", "replace")
+        if index == 0:
+            text = text.lstrip("\ufeff")  # Excel adds a BOM to UTF-8 CSVs
+        row = _parse_row(text)
+        return row[0] if row else ""
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def sample(self, rng):
+        """Draw one title index in constant time."""
+        n = len(self)
+        if self._probability is None:
+            return rng.randrange(n)
+        position = rng.random() * n
+        i = int(position)
+        return i if position - i < self._probability[i] else self._alias[i]
+
+    def sample_excluding(self, rng, excluded):
+        """Draw one title index outside the set excluded, keeping the relative weights.
+
+        Takes O(len(excluded)) steps: the draw is made over the titles that
+        are left, then shifted past every excluded index below it.
+        """
+        excluded = sorted(excluded)
+        cumulative = self._cumulative
+        if cumulative is None:
+            position = rng.randrange(len(self) - len(excluded))
+            for index in excluded:
+                if index > position:
+                    break
+                position += 1
+            return position
+        starts = [cumulative[index - 1] if index else 0.0 for index in excluded]
+        left = cumulative[-1] - sum(cumulative[index] - start for index, start in zip(excluded, starts))
+        position = rng.random() * left
+        for index, start in zip(excluded, starts):
+            if start > position:
+                break
+            position += cumulative[index] - start
+        return min(bisect_right(cumulative, position), len(self) - 1)
+
+    def sampler(self, rng):
+        """Return a function drawing title indexes that honours the no-repeat window.
+
+        No title comes back within the window as long as the pool has more
+        titles with a weight than the window is long. Draws are resampled a
+        few times first, which is cheap when the recent titles carry little
+        weight, and otherwise taken from the titles outside the window.
+        The window lives in the returned function, so each day keeps its own
+        history and days stay independent of each other.
+        """
+        window = min(self.no_repeat, self._drawable - 1)
+        if window <= 0:
+            return lambda: self.sample(rng)
+        recent = deque(maxlen=window)
+
+        def draw():
+            index = self.sample(rng)
+            for _ in range(MAX_REPEAT_RETRIES):
+                if index not in recent:
+                    break
+                index = self.sample(rng)
+            else:
+                if index in recent:
+                    index = self.sample_excluding(rng, recent)
+            recent.append(index)
+            return index
+        return draw
+
+def title_sampler(titles, rng):
+    """Return a title index sampler for a TitlePool or a plain list."""
+    if isinstance(titles, TitlePool):
+        return titles.sampler(rng)
+    n = len(titles)
+    return lambda: rng.randrange(n)
@@ -0,0 +1,303 @@
+"""Vectorized bulk day generator.
+
+Generates thousands of days at once with NumPy, following the same rules as
+main.generate_day_events(): a 17:00-19:00 end of workday, a 7:45-9:00 first
+event, 70/30 short/long durations, 40% overlap probability, short fills
+inside events of 90+ minutes and gap filling up to 9 events per day.
+
+Instead of looping per event, every step draws one batch of random numbers
+for all days that are still active, so the Python-level work is bounded by
+the number of event slots in a day rather than the number of days.
+
+Run this module directly to compare its statistics with the scalar path:
+
+    python vectorized.py --days 5000
+"""
+import argparse
+import random
+import hashlib
+import datetime
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for the vectorized engine
+    np = None
+
+import main
+
+# Room for the first pass (a start advances at least 15 minutes per event,
+# so at most ~46 events fit between 7:45 and 19:00) plus the overlap fills
+MAX_EVENTS_PER_DAY = 72
+
+# Sentinel start for unused slots so they sort after every real event
+_UNUSED = 10_000
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The vectorized engine requires NumPy (pip install numpy)")
+
+def _randrange15(rng, width):
+    """Vectorized random.randrange(0, width, 15) for an array of widths."""
+    steps = -(-width // 15)  # ceil(width / 15)
+    return (rng.random(width.shape) * steps).astype(np.int64) * 15
+
+def _append(batch, days, start, end, title):
+    """Append one event to each of the given days."""
+    slot = batch['count'][days]
+    batch['start'][days, slot] = start
+    batch['end'][days, slot] = end
+    batch['title'][days, slot] = title
+    batch['count'][days] += 1
+
+def generate_days(n_days, n_titles, scaling_factors=None, rng=None):
+    """Generate n_days days of events in one batch.
+
+    scaling_factors is an optional per-day array that mirrors the argument
+    of main.generate_day_events(). rng is a numpy.random.Generator or a
+    seed.
+
+    Returns a dict of arrays: 'start', 'end' and 'title' of shape
+    (n_days, MAX_EVENTS_PER_DAY) in minutes since midnight / title index,
+    'count' with the number of events per day and 'end_of_workday' in
+    minutes since midnight.
+    """
+    _require_numpy()
+    if not isinstance(rng, np.random.Generator):
+        rng = np.random.default_rng(rng)
+    if scaling_factors is None:
+        scaling_factors = np.ones(n_days)
+    scaling_factors = np.asarray(scaling_factors, dtype=np.float64)
+    reduce_density = scaling_factors < 1.0
+
+    batch = {
+        'start': np.full((n_days, MAX_EVENTS_PER_DAY), _UNUSED, dtype=np.int16),
+        'end': np.full((n_days, MAX_EVENTS_PER_DAY), _UNUSED, dtype=np.int16),
+        'title': np.zeros((n_days, MAX_EVENTS_PER_DAY), dtype=np.int32),
+        'count': np.zeros(n_days, dtype=np.int64),
+        'end_of_workday': rng.choice(main.WORKDAY_END_CHOICES, n_days),
+    }
+    end_of_workday = batch['end_of_workday']
+
+    # Target event count with scaling if enabled
+    base_target = rng.integers(9, 16, n_days)
+    target_event_count = np.where(
+        reduce_density, np.maximum(3, (base_target * scaling_factors).astype(np.int64)), base_target)
+
+    # Reduced days stop adding first-pass events with a fixed chance per
+    # slot once they have 3, like main.sample_first_pass_limit()
+    stop_probability = np.where(
+        reduce_density, main.first_pass_stop_probability(np.minimum(scaling_factors, 1.0)), 0.0)
+
+    def draw_durations(days):
+        sf = scaling_factors[days]
+        short_only = reduce_density[days] & (rng.random(len(days)) > sf)
+        regular_short = rng.random(len(days)) < 0.7
+        return np.where(
+            short_only, 30 + 15 * rng.integers(0, 3, len(days)),
+            np.where(regular_short, 30 + 15 * rng.integers(0, 5, len(days)),
+                     90 + 15 * rng.integers(0, 11, len(days))))
+
+    # First pass: one event slot at a time for every active day
+    days = np.arange(n_days)
+    start = rng.choice(main.FIRST_START_CHOICES, n_days)
+    previous_start = np.zeros(n_days, dtype=np.int64)
+    previous_end = np.zeros(n_days, dtype=np.int64)
+    long_days, long_starts, long_ends = [], [], []
+    first = True
+    while len(days):
+        if not first:
+            # Reduced-density days stop early once they have 3 events
+            stops = (batch['count'][days] >= 3) & (rng.random(len(days)) < stop_probability[days])
+            days = days[~stops]
+
+            prev_start = previous_start[days]
+            prev_end = previous_end[days]
+            min_start = prev_start + 15
+            max_start = prev_end - 15
+            overlap = (rng.random(len(days)) < 0.4) & (min_start < max_start)
+            width = np.where(overlap, max_start - min_start, 15)
+            overlap_start = min_start + _randrange15(rng, width)
+            break_start = prev_end + rng.choice([5, 10, 15], len(days))
+            start = np.where(overlap, overlap_start, break_start)
+
+            # Days whose next start is past the end of workday are done
+            in_day = start < end_of_workday[days]
+            days = days[in_day]
+            start = start[in_day]
+            if not len(days):
+                break
+        first = False
+
+        end = np.minimum(start + draw_durations(days), end_of_workday[days])
+        previous_start[days] = start
+        previous_end[days] = end
+        _append(batch, days, start, end, rng.integers(0, n_titles, len(days)))
+
+        # Track longer events (90+ minutes) for adding overlapping short events
+        is_long = end - start >= 90
+        long_days.append(days[is_long])
+        long_starts.append(start[is_long])
+        long_ends.append(end[is_long])
+
+    # Second pass: the k-th long event of every day is filled in the same
+    # step, so per-day event caps are applied in the scalar order
+    for day_ids, long_start, long_end in zip(long_days, long_starts, long_ends):
+        if not len(day_ids):
+            continue
+        long_duration = long_end - long_start
+        coverage_percent = rng.uniform(0.65, 0.85, len(day_ids))
+        target_overlap = (long_duration * coverage_percent).astype(np.int64)
+        num_short = np.maximum(1, target_overlap // 30)
+        covered = np.zeros(len(day_ids), dtype=np.int64)
+        attempts = np.zeros(len(day_ids), dtype=np.int64)
+        max_start = long_end - 15
+        active = np.ones(len(day_ids), dtype=bool)
+        while True:
+            min_start = long_start + covered
+            active &= ((covered < target_overlap) & (attempts < num_short * 2)
+                       & (batch['count'][day_ids] < target_event_count[day_ids] + 5)
+                       & (min_start < max_start))
+            idx = np.nonzero(active)[0]
+            if not len(idx):
+                break
+            short_start = min_start[idx] + _randrange15(rng, max_start[idx] - min_start[idx])
+            short_end = np.minimum(short_start + rng.choice([15, 30, 45], len(idx)), long_end[idx])
+            _append(batch, day_ids[idx], short_start, short_end, rng.integers(0, n_titles, len(idx)))
+            covered[idx] += short_end - short_start
+            attempts[idx] += 1
+
+    # Add extra events to days below the minimum target (9)
+    days = np.nonzero(batch['count'] < 9)[0]
+    columns = np.arange(MAX_EVENTS_PER_DAY - 1)
+    while len(days):
+        order = np.lexsort((batch['end'][days], batch['start'][days]), axis=-1)
+        sorted_start = np.take_along_axis(batch['start'][days], order, axis=1).astype(np.int64)
+        sorted_end = np.take_along_axis(batch['end'][days], order, axis=1).astype(np.int64)
+        # Free gaps start where everything before them has ended
+        sorted_end = np.maximum.accumulate(sorted_end, axis=1)
+        gap = sorted_start[:, 1:] - sorted_end[:, :-1]
+        valid = (columns < (batch['count'][days] - 1)[:, None]) & (gap >= 30)
+
+        has_gap = valid.any(axis=1)
+        days, gap, valid = days[has_gap], gap[has_gap], valid[has_gap]
+        sorted_end = sorted_end[has_gap]
+        if not len(days):
+            break
+
+        # Choose a random valid gap per day
+        choice = np.argmax(np.where(valid, rng.random(valid.shape), -1.0), axis=1)
+        rows = np.arange(len(days))
+        gap_start = sorted_end[rows, choice]
+        duration = np.minimum(rng.choice([15, 30, 45], len(days)), gap[rows, choice] - 5)
+        start = gap_start + 5
+        _append(batch, days, start, start + duration, batch['count'][days] % n_titles)
+        days = days[batch['count'][days] < 9]
+
+    return batch
+
+def iter_day_events(batch):
+    """Yield (events, (end_hour, end_minute)) per day like generate_day_events()."""
+    starts = batch['start'].tolist()
+    ends = batch['end'].tolist()
+    titles = batch['title'].tolist()
+    for i, count in enumerate(batch['count'].tolist()):
+        events = [main.Event(starts[i][j], ends[i][j], titles[i][j]) for j in range(count)]
+        yield events, divmod(int(batch['end_of_workday'][i]), 60)
+
+def numpy_seed(seed):
+    """Return seed as something np.random.default_rng() accepts.
+
+    Integers and None pass through. Other seeds, e.g. the per-user string
+    seeds of the feed server, are hashed with SHA-512 like random.Random
+    does for strings, so they stay stable across processes.
+    """
+    if seed is None or isinstance(seed, int):
+        return seed
+    digest = hashlib.sha512(str(seed).encode("utf-8")).digest()
+    return int.from_bytes(digest[:16], "big")
+
+def iter_schedule_day_events(days_to_generate, pattern, n_titles, seed=None, block_days=4096):
+    """Yield (events, end_of_workday) for a date range, generated in blocks.
+
+    Blocks keep the working arrays small, so memory stays flat for long
+    ranges while each block still runs fully vectorized. A seeded run is
+    reproducible for the same range, but unlike the Python engine the days
+    share one stream, so a single day cannot be regenerated on its own.
+    Titles are drawn uniformly; TitlePool weights and the no-repeat window
+    only apply to the Python engine.
+    """
+    _require_numpy()
+    rng = np.random.default_rng(numpy_seed(seed))
+    for block_start in range(0, days_to_generate, block_days):
+        offsets = range(block_start, min(days_to_generate, block_start + block_days))
+        batch = generate_days(
+            len(offsets), n_titles,
+            [main.get_scaling_factor(pattern, day_offset) for day_offset in offsets],
+            rng)
+        yield from iter_day_events(batch)
+
+def _day_statistics(days):
+    """Summary statistics for a list of (events, end_of_workday) days."""
+    counts, durations, busy, overlaps = [], [], [], []
+    for events, _ in days:
+        counts.append(len(events))
+        durations.extend(event.duration for event in events)
+        ordered = sorted((event.start, event.end) for event in events)
+        covered, current_end, overlapping = 0, -1, 0
+        for start, end in ordered:
+            if start < current_end:
+                overlapping += 1
+            covered += max(0, end - max(start, current_end))
+            current_end = max(current_end, end)
+        busy.append(covered)
+        overlaps.append(overlapping / len(events) if events else 0.0)
+    return {
+        'events_per_day': float(np.mean(counts)),
+        'mean_duration': float(np.mean(durations)),
+        'long_share': float(np.mean(np.asarray(durations) >= 90)),
+        'busy_minutes': float(np.mean(busy)),
+        'overlap_share': float(np.mean(overlaps)),
+    }
+
+def compare_with_scalar(n_days=2000, pattern="even", seed=0, tolerance=0.05):
+    """Compare vectorized and scalar statistics for the same pattern.
+
+    Returns (passed, rows) where rows holds (name, scalar, vectorized,
+    relative difference) per statistic.
+    """
+    _require_numpy()
+    titles = ["Task"]
+    start_date = datetime.date(2025, 1, 6)
+    scaling_factors = [main.get_scaling_factor(pattern, d) for d in range(n_days)]
+
+    rng = random.Random(seed)
+    scalar_days = [
+        main.generate_day_events(start_date + datetime.timedelta(days=d), titles, rng,
+                                 scaling_factors[d])
+        for d in range(n_days)
+    ]
+    batch = generate_days(n_days, len(titles), scaling_factors, rng=seed)
+
+    scalar = _day_statistics(scalar_days)
+    vector = _day_statistics(iter_day_events(batch))
+    rows = []
+    for name in scalar:
+        difference = abs(vector[name] - scalar[name]) / max(abs(scalar[name]), 1e-9)
+        rows.append((name, scalar[name], vector[name], difference))
+    return all(difference <= tolerance for *_, difference in rows), rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the vectorized engine against the scalar generator.")
+    parser.add_argument("--days", type=int, default=2000, help="days to simulate per pattern")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tolerance", type=float, default=0.05, help="allowed relative difference")
+    args = parser.parse_args()
+
+    all_passed = True
+    for pattern in main.PATTERNS:
+        passed, rows = compare_with_scalar(args.days, pattern, args.seed, args.tolerance)
+        all_passed &= passed
+        print(f"\n{pattern}: {'OK' if passed else 'MISMATCH'}")
+        for name, scalar, vector, difference in rows:
+            print(f"  {name:<15} scalar={scalar:8.2f} vectorized={vector:8.2f} diff={difference:6.1%}")
+    raise SystemExit(0 if all_passed else 1)